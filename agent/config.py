@@ -4,9 +4,18 @@ from typing import Literal
 @dataclass(frozen=True)
 class AgentConfig:
     top_k: int = 5
+    # Best-matching chunks returned with each search hit and used as its content snippet;
+    # 0 (default) fetches the articles with get_articles_content instead. Snippets are only as long
+    # as the indexed chunks, so enable them when chunks are large enough to fill the classifier context.
+    retrieval_snippets: int = 0
     mcp_timeout_s: float = 20.0
-    # Choose provider: "openai" or "huggingface"
-    llm_provider: Literal["openai","huggingface"] = "openai"
+    # "stdio": spawn the MCP server as a subprocess (MCP_SERVER_CMD/MCP_SERVER_ARGS);
+    # "inprocess": call the server's tools in this process (one embedding model, no IPC)
+    mcp_transport: Literal["stdio", "inprocess"] = "stdio"
+    # Concurrent tool calls of one node over the shared session
+    mcp_max_concurrency: int = 4
+    # Choose provider: "openai", "huggingface" or "stub" (offline, deterministic; see agent/llm.py)
+    llm_provider: Literal["openai","huggingface","stub"] = "openai"
 
     # OpenAI (only used if llm_provider="openai")
     llm_model: str = "gemini-2.0-flash"
@@ -19,6 +28,16 @@ class AgentConfig:
     hf_do_sample: bool = False
     hf_repetition_penalty: float = 1.03
 
+    # HTML text extraction for url inputs: "default" (BeautifulSoup) or "fast" (lxml)
+    html_extractor: Literal["default", "fast"] = "default"
+
     temperature: float = 0.2
+
+    # Persistent LLM response cache (SQLite, see agent/llm_cache.py); None disables it. Only used when
+    # the answers are reproducible: temperature <= llm_cache_max_temperature (or greedy decoding)
+    llm_cache_path: str | None = None
+    llm_cache_max_temperature: float = 0.0
+    llm_cache_ttl_s: float | None = None
+    llm_cache_max_mb: float | None = 256
     mcp_timeout_s: float = 10.0
     max_tokens=3200
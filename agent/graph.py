@@ -18,10 +18,12 @@ def build_graph() -> Any:
     g.add_node("review", node_review)
 
     g.set_entry_point("normalize")
+    # extract only needs the normalized text, so it runs in parallel with retrieve -> classify;
+    # review waits for both branches
     g.add_edge("normalize", "retrieve")
+    g.add_edge("normalize", "extract")
     g.add_edge("retrieve", "classify")
-    g.add_edge("classify", "extract")
-    g.add_edge("extract", "review")
+    g.add_edge(["classify", "extract"], "review")
     g.add_edge("review", END)
 
     return g.compile()
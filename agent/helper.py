@@ -1,24 +1,7 @@
 import json
-import os
 from typing import Any
 from agent.config import AgentConfig
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-def make_llm(cfg: AgentConfig):
-    if not os.getenv("OPENAI_API_KEY"):
-        raise RuntimeError(
-            "Missing OPENAI_API_KEY. "
-            "Create an OpenAI API key and export it as OPENAI_API_KEY."
-        )
-    
-
-    llm = ChatGoogleGenerativeAI(
-        model=cfg.llm_model, 
-        temperature=cfg.temperature,
-        max_tokens=cfg.max_tokens,
-    )
-    return llm
 
 def _safe_json_loads(text: str) -> Any:
     text = text.strip()
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+from agent.config import AgentConfig
+from agent.llm_cache import LLMResponseCache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+@dataclass(frozen=True)
+class LLMProvider:
+    """
+    create builds a chat model from the config; key picks the config fields it depends on,
+    so configs that only differ elsewhere (top_k, html_extractor, ...) share one client.
+    deterministic tells whether the config gives (near) reproducible answers, which the
+    response cache requires.
+    """
+    create: Callable[[AgentConfig], BaseChatModel]
+    key: Callable[[AgentConfig], Hashable]
+    deterministic: Callable[[AgentConfig], bool]
+
+LLM_PROVIDERS: dict[str, LLMProvider] = {}
+
+def _low_temperature(cfg: AgentConfig) -> bool:
+    return cfg.temperature <= cfg.llm_cache_max_temperature
+
+def register_llm_provider(
+    name: str,
+    key: Callable[[AgentConfig], Hashable],
+    deterministic: Callable[[AgentConfig], bool] = _low_temperature,
+) -> Callable[[Callable[[AgentConfig], BaseChatModel]], Callable[[AgentConfig], BaseChatModel]]:
+    def decorator(fn: Callable[[AgentConfig], BaseChatModel]) -> Callable[[AgentConfig], BaseChatModel]:
+        LLM_PROVIDERS[name] = LLMProvider(create=fn, key=key, deterministic=deterministic)
+        return fn
+    return decorator
+
+def get_llm_provider(name: str) -> LLMProvider:
+    try:
+        return LLM_PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM provider {name!r}. Available: {sorted(LLM_PROVIDERS)}")
+
+_clients: dict[tuple[str, Hashable], BaseChatModel] = {}
+_clients_lock = threading.Lock()
+
+def get_llm(cfg: AgentConfig) -> BaseChatModel:
+    """
+    Process-wide chat model for cfg.llm_provider, created on first use and reused by every node
+    (and every graph run), so env checks, client setup and HTTP connections are not redone per call.
+    """
+    provider = get_llm_provider(cfg.llm_provider)
+    key = (cfg.llm_provider, provider.key(cfg))
+    with _clients_lock:
+        llm = _clients.get(key)
+        if llm is None:
+            llm = provider.create(cfg)
+            _clients[key] = llm
+        return llm
+
+def clear_llm_cache() -> None:
+    with _clients_lock:
+        _clients.clear()
+        _response_caches.clear()
+
+@dataclass(frozen=True)
+class LLMResponse:
+    content: str
+    cached: bool = False
+    cache: LLMResponseCache | None = field(default=None, repr=False, compare=False)
+    key: str | None = None
+
+    def confirm(self) -> None:
+        """
+        Store a fresh response in the cache. Nodes call it once they have parsed and validated the
+        response, so an invalid answer is asked again on the next run instead of being replayed.
+        """
+        if self.cache is not None and self.key is not None and not self.cached and isinstance(self.content, str):
+            self.cache.put(self.key, self.content)
+
+_response_caches: dict[tuple[str, float | None, float | None], LLMResponseCache] = {}
+
+def get_llm_response_cache(cfg: AgentConfig) -> LLMResponseCache | None:
+    """
+    Process-wide response cache at cfg.llm_cache_path; None if disabled or if the provider
+    samples with this config (temperature above cfg.llm_cache_max_temperature).
+    """
+    if not cfg.llm_cache_path or not get_llm_provider(cfg.llm_provider).deterministic(cfg):
+        return None
+    key = (cfg.llm_cache_path, cfg.llm_cache_ttl_s, cfg.llm_cache_max_mb)
+    with _clients_lock:
+        cache = _response_caches.get(key)
+        if cache is None:
+            max_bytes = int(cfg.llm_cache_max_mb * 1024 * 1024) if cfg.llm_cache_max_mb else None
+            cache = LLMResponseCache(cfg.llm_cache_path, ttl_s=cfg.llm_cache_ttl_s, max_bytes=max_bytes)
+            _response_caches[key] = cache
+        return cache
+
+def invoke_llm(cfg: AgentConfig, messages: list[BaseMessage]) -> LLMResponse:
+    """
+    llm.invoke(messages).content through the response cache: the key is the provider, the config fields
+    of its client (model, temperature, ...) and the messages, so only identical calls are served from it.
+    The client itself is only created on a cache miss, and a fresh response is only stored by confirm().
+    """
+    cache = get_llm_response_cache(cfg)
+    key = None
+    if cache is not None:
+        namespace = [cfg.llm_provider, get_llm_provider(cfg.llm_provider).key(cfg)]
+        key = cache.make_key(namespace, [(m.type, m.content) for m in messages])
+        content = cache.get(key)
+        if content is not None:
+            return LLMResponse(content=content, cached=True)
+
+    content = get_llm(cfg).invoke(messages).content
+    return LLMResponse(content=content, cache=cache, key=key)
+
+@register_llm_provider("openai", key=lambda cfg: (cfg.llm_model, cfg.temperature, cfg.max_tokens))
+def _openai_llm(cfg: AgentConfig) -> BaseChatModel:
+    # Historical provider name: llm_model is served through langchain-google-genai
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    if not os.getenv("OPENAI_API_KEY"):
+        raise RuntimeError(
+            "Missing OPENAI_API_KEY. "
+            "Create an OpenAI API key and export it as OPENAI_API_KEY."
+        )
+
+    return ChatGoogleGenerativeAI(
+        model=cfg.llm_model,
+        temperature=cfg.temperature,
+        max_tokens=cfg.max_tokens,
+    )
+
+@register_llm_provider(
+    "huggingface",
+    key=lambda cfg: (
+        cfg.hf_repo_id, cfg.hf_provider, cfg.hf_task, cfg.hf_max_new_tokens,
+        cfg.hf_do_sample, cfg.hf_repetition_penalty, cfg.temperature,
+    ),
+    # Greedy decoding ignores the temperature
+    deterministic=lambda cfg: not cfg.hf_do_sample or _low_temperature(cfg),
+)
+def _huggingface_llm(cfg: AgentConfig) -> BaseChatModel:
+    from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+    if not os.getenv("HUGGINGFACEHUB_API_TOKEN") and not os.getenv("HF_TOKEN"):
+        raise RuntimeError(
+            "Missing HF_TOKEN. "
+            "Create a Hugging Face access token and export it as HF_TOKEN."
+        )
+
+    endpoint = HuggingFaceEndpoint(
+        repo_id=cfg.hf_repo_id,
+        provider=cfg.hf_provider,
+        task=cfg.hf_task,
+        max_new_tokens=cfg.hf_max_new_tokens,
+        do_sample=cfg.hf_do_sample,
+        repetition_penalty=cfg.hf_repetition_penalty,
+        temperature=cfg.temperature if cfg.hf_do_sample else None,
+    )
+    return ChatHuggingFace(llm=endpoint)
+
+_LABELS_RE = re.compile(r"Choose exactly ONE label among: (.+)")
+_JSON_KEYS_RE = re.compile(r"^\s*\"(.+?)\":", re.MULTILINE)
+_KEY_LIST_RE = re.compile(r"Use EXACTLY these keys:\n(\[.*\])")
+
+class StubChatModel(BaseChatModel):
+    """
+    Offline chat model for tests and benchmarks: answers from the prompts alone, deterministically
+    (same messages, same answer), in the shape each node expects.
+    - classifier prompt: the label that the hash of the article text picks among the offered ones
+    - JSON key prompts (extraction and its repair): the keys filled with sentences of the article
+    - anything else (review): a Markdown review with the expected sections
+    """
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        content = self._respond([m.content if isinstance(m.content, str) else str(m.content) for m in messages])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    @staticmethod
+    def _respond(texts: list[str]) -> str:
+        system, user = texts[0], "\n".join(texts[1:])
+        digest = int(hashlib.sha256(user.encode("utf-8")).hexdigest(), 16)
+        # The review message prefixes the article with "=== SECTION ===" headers: keep the last section
+        article = user.rsplit("===\n", 1)[-1]
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", article) if s.strip()] or [""]
+
+        labels = _LABELS_RE.search(system)
+        if labels:
+            options = [label.strip() for label in labels.group(1).split(",") if label.strip()]
+            return json.dumps({"area": options[digest % len(options)], "rationale": "Stub classification."})
+
+        key_list = _KEY_LIST_RE.search(system)
+        keys = json.loads(key_list.group(1)) if key_list else _JSON_KEYS_RE.findall(system)
+        if keys:
+            out: dict[str, Any] = {}
+            for i, key in enumerate(keys):
+                if key.startswith("step by step"):
+                    out[key] = [sentences[(i + j) % len(sentences)][:200] for j in range(3)]
+                else:
+                    out[key] = sentences[i % len(sentences)][:200]
+            return json.dumps(out, ensure_ascii=False)
+
+        return (
+            "## Resenha\n"
+            f"**Pontos positivos:** {sentences[0][:200]}\n\n"
+            f"**Possíveis falhas:** {sentences[-1][:200]}\n\n"
+            "**Comentários finais:** Resenha gerada pelo provedor stub.\n"
+        )
+
+@register_llm_provider("stub", key=lambda cfg: None, deterministic=lambda cfg: True)
+def _stub_llm(cfg: AgentConfig) -> BaseChatModel:
+    return StubChatModel()
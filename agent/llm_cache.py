@@ -0,0 +1,31 @@
+# Persistent LLM response cache: completions in SQLite keyed by sha256(provider config + messages)
+import hashlib
+import json
+from typing import Any
+from indexer.sqlite_cache import SQLiteLRUCache
+
+class LLMResponseCache(SQLiteLRUCache):
+    """On-disk cache of chat model responses with a TTL and least-recently-used eviction by size.
+
+    Keys must include everything that changes the response (see agent.llm.invoke_llm): provider,
+    model, temperature and the messages. Nodes of one graph run call it from several threads.
+    """
+    table = "responses"
+    value_columns = (("content", "TEXT"),)
+    size_expr = "LENGTH(CAST(content AS BLOB))"
+
+    def __init__(self, path: str, ttl_s: float | None = None, max_bytes: int | None = None):
+        super().__init__(path, max_bytes=max_bytes, ttl_s=ttl_s)
+
+    @staticmethod
+    def make_key(namespace: Any, messages: list[tuple[str, str]]) -> str:
+        payload = json.dumps({"namespace": namespace, "messages": messages}, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response if present and not older than ttl_s, and refresh its last_used."""
+        row = self._get_many([key]).get(key)
+        return row[0] if row is not None else None
+
+    def put(self, key: str, content: str):
+        self._put_many({key: (content,)})
@@ -1,14 +1,18 @@
 import asyncio
 import json
+import logging
 import os
 import threading
 from dataclasses import dataclass
 from typing import Any, Iterable, Optional, Coroutine
 from concurrent.futures import Future
+from pydantic_core import to_jsonable_python
 from agent.config import AgentConfig
 from mcp import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
 
+logger = logging.getLogger(__name__)
+
 _session: Optional[ClientSession] = None
 _stdio_cm = None
 _session_lock = asyncio.Lock()
@@ -16,6 +20,10 @@ _session_lock = asyncio.Lock()
 _loop: Optional[asyncio.AbstractEventLoop] = None
 _thread: Optional[threading.Thread] = None
 
+# Tool functions of mcp_server.server, bound once for the "inprocess" transport
+_inprocess_tools: Optional[dict[str, Any]] = None
+_inprocess_lock = threading.Lock()
+
 @dataclass(frozen=True)
 class MCPClientConfig:
     """
@@ -112,24 +120,73 @@ async def close_mcp_session() -> None:
             await _stdio_cm.__aexit__(None, None, None)
             _stdio_cm = None
 
+def _get_inprocess_tools() -> dict[str, Any]:
+    """
+    Import the server in this process and load its state (collection, embedding model) once.
+    """
+    global _inprocess_tools
+
+    with _inprocess_lock:
+        if _inprocess_tools is not None:
+            return _inprocess_tools
+
+        from mcp_server import server
+
+        server.warm_start()
+        tools = {}
+        for name in ("search_articles", "get_article_content", "search_articles_batch", "get_articles_content"):
+            tool = getattr(server, name)
+            # @mcp.tool wraps the function in a FunctionTool; the plain function is its .fn
+            tools[name] = getattr(tool, "fn", tool)
+        _inprocess_tools = tools
+        return tools
+
+async def _call_tool_inprocess(tools: dict[str, Any], tool_name: str, args: dict[str, Any]) -> Any:
+    if tool_name not in tools:
+        raise ValueError(f"Unknown MCP tool: {tool_name}. Available: {sorted(tools)}")
+    # Tools are blocking (Chroma, embedding model): run them off the event loop.
+    # Results go through the same JSON shape as over stdio, minus the serialization.
+    result = await asyncio.to_thread(tools[tool_name], **args)
+    return to_jsonable_python(result)
+
 async def _call_tool(tool_name: str, args: dict[str, Any], cfg: AgentConfig) -> Any:
     """
     start stdio client, open session, initialize, call tool, close.
+    With cfg.mcp_transport="inprocess", call the server's tool function in this process instead.
     """
+    if cfg.mcp_transport == "inprocess":
+        # Loading is not part of the call timeout, as with the stdio session initialization
+        tools = await asyncio.to_thread(_get_inprocess_tools)
+        data = await asyncio.wait_for(_call_tool_inprocess(tools, tool_name, args), timeout=cfg.mcp_timeout_s)
+        logger.debug("MCP tool call %s(%s)", tool_name, ", ".join(args))
+        return data
+
     session = await _get_session(cfg)
     raw = await asyncio.wait_for(
         session.call_tool(tool_name, args),
         timeout=cfg.mcp_timeout_s
     )
-    print(tool_name, args)
+    logger.debug("MCP tool call %s(%s)", tool_name, ", ".join(args))
     return _unwrap_mcp_result(raw)
 
 
-def search_articles(query: str, cfg: AgentConfig) -> list[dict[str, Any]]:
+def _search_filters(area: str | None, doc_ids: list[str] | None) -> dict[str, Any]:
+    filters: dict[str, Any] = {}
+    if area:
+        filters["area"] = area
+    if doc_ids:
+        filters["doc_ids"] = doc_ids
+    return filters
+
+
+def search_articles(
+    query: str, cfg: AgentConfig, max_snippets: int = 0, area: str | None = None, doc_ids: list[str] | None = None
+) -> list[dict[str, Any]]:
     """
-    Calls MCP tool: search_articles(query: str) -> [{id,title,area,score}]
+    Calls MCP tool: search_articles(query: str, max_snippets: int, area?, doc_ids?) -> [{id,title,area,score,snippets}]
     """
-    data = run_async(_call_tool("search_articles", {"query": query}, cfg))
+    args = {"query": query, "max_snippets": max_snippets, **_search_filters(area, doc_ids)}
+    data = run_async(_call_tool("search_articles", args, cfg))
 
     if not isinstance(data, list):
         raise TypeError(f"search_articles expected list, got {type(data)}")
@@ -142,11 +199,12 @@ def search_articles(query: str, cfg: AgentConfig) -> list[dict[str, Any]]:
     return data
 
 
-def get_article_content(article_id: str, cfg: AgentConfig) -> dict[str, Any]:
+def get_article_content(article_id: str, cfg: AgentConfig, max_chars: int = 40000, offset: int = 0) -> dict[str, Any]:
     """
-    Calls MCP tool: get_article_content(id: str) -> {id,title,area,content}
+    Calls MCP tool: get_article_content(id: str, max_chars: int, offset: int) -> {id,title,area,content,offset,next_offset}
     """
-    data = run_async(_call_tool("get_article_content", {"id": article_id}, cfg))
+    args = {"id": article_id, "max_chars": max_chars, "offset": offset}
+    data = run_async(_call_tool("get_article_content", args, cfg))
 
     if not isinstance(data, dict):
         raise TypeError(f"get_article_content expected dict, got {type(data)}")
@@ -154,6 +212,88 @@ def get_article_content(article_id: str, cfg: AgentConfig) -> dict[str, Any]:
     _require_keys(data, ["id", "title", "area", "content"], where="get_article_content")
     return data
 
+def search_articles_batch(
+    queries: list[str], cfg: AgentConfig, max_snippets: int = 0, area: str | None = None, doc_ids: list[str] | None = None
+) -> list[list[dict[str, Any]]]:
+    """
+    Calls MCP tool: search_articles_batch(queries: list[str], max_snippets: int, area?, doc_ids?) -> [[{id,title,area,score,snippets}], ...]
+    """
+    args = {"queries": queries, "max_snippets": max_snippets, **_search_filters(area, doc_ids)}
+    data = run_async(_call_tool("search_articles_batch", args, cfg))
+
+    if not isinstance(data, list) or len(data) != len(queries):
+        raise TypeError(f"search_articles_batch expected {len(queries)} lists, got {type(data)}")
+
+    for q, hits in enumerate(data):
+        if not isinstance(hits, list):
+            raise TypeError(f"search_articles_batch[{q}] expected list, got {type(hits)}")
+        for i, item in enumerate(hits):
+            if not isinstance(item, dict):
+                raise TypeError(f"search_articles_batch[{q}] hit[{i}] expected dict, got {type(item)}")
+            _require_keys(item, ["id", "title", "area", "score"], where=f"search_articles_batch[{q}] hit[{i}]")
+
+    return data
+
+
+def get_articles_content(article_ids: list[str], cfg: AgentConfig, max_chars: int = 40000, offset: int = 0) -> list[dict[str, Any]]:
+    """
+    Calls MCP tool: get_articles_content(ids: list[str], max_chars: int, offset: int) -> [{id,title,area,content,offset,next_offset}, ...]
+    The default way to fetch several articles: one round trip and one lookup for all ids.
+    A single failing id fails the whole call; see get_article_content_concurrent.
+    """
+    args = {"ids": article_ids, "max_chars": max_chars, "offset": offset}
+    data = run_async(_call_tool("get_articles_content", args, cfg))
+
+    if not isinstance(data, list) or len(data) != len(article_ids):
+        raise TypeError(f"get_articles_content expected {len(article_ids)} dicts, got {type(data)}")
+
+    for i, item in enumerate(data):
+        if not isinstance(item, dict):
+            raise TypeError(f"get_articles_content[{i}] expected dict, got {type(item)}")
+        _require_keys(item, ["id", "title", "area", "content"], where=f"get_articles_content[{i}]")
+
+    return data
+
+async def _gather_tool_calls(calls: list[tuple[str, dict[str, Any]]], cfg: AgentConfig) -> list[Any]:
+    """
+    Run tool calls concurrently over the shared session, at most cfg.mcp_max_concurrency at a time.
+    Each call keeps its own cfg.mcp_timeout_s; results (or the raised exceptions) come back in call order.
+    """
+    semaphore = asyncio.Semaphore(max(1, cfg.mcp_max_concurrency))
+
+    async def call(tool_name: str, args: dict[str, Any]) -> Any:
+        async with semaphore:
+            return await _call_tool(tool_name, args, cfg)
+
+    return await asyncio.gather(*(call(name, args) for name, args in calls), return_exceptions=True)
+
+
+def get_article_content_concurrent(
+    article_ids: list[str], cfg: AgentConfig, max_chars: int = 40000, offset: int = 0
+) -> list[dict[str, Any] | Exception]:
+    """
+    Concurrent get_article_content calls, one per id: {id,title,area,content,offset,next_offset} or the
+    exception of that call, in order. Unlike get_articles_content, a failing id does not fail the others,
+    at the cost of one round trip per id: use it as the fallback when the batched call fails, or when
+    partial results are worth more than the single call.
+    """
+    calls = [("get_article_content", {"id": article_id, "max_chars": max_chars, "offset": offset}) for article_id in article_ids]
+    results = run_async(_gather_tool_calls(calls, cfg))
+
+    docs: list[dict[str, Any] | Exception] = []
+    for i, data in enumerate(results):
+        if isinstance(data, BaseException) and not isinstance(data, Exception):
+            raise data
+        if not isinstance(data, Exception):
+            try:
+                if not isinstance(data, dict):
+                    raise TypeError(f"get_article_content expected dict, got {type(data)}")
+                _require_keys(data, ["id", "title", "area", "content"], where=f"get_article_content[{i}]")
+            except (TypeError, ValueError) as e:
+                data = e
+        docs.append(data)
+    return docs
+
 def _loop_worker(loop: asyncio.AbstractEventLoop) -> None:
     asyncio.set_event_loop(loop)
     loop.run_forever()
@@ -1,14 +1,15 @@
 from ast import parse
 import json
 import logging
-from typing import Iterable
+from typing import Any, Iterable
 from pydantic import BaseModel, Field, ValidationError
 from agent.prompts import classifier_prompt
 from agent.state import AgentState
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 from mcp_server.tools import Area
-from agent.helper import get_config, make_llm, basic_parse_json, _safe_json_loads
+from agent.helper import get_config, basic_parse_json, _safe_json_loads
+from agent.llm import invoke_llm
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +28,14 @@ class ClassifierOut(BaseModel):
         return next(iter(sorted(allowed_set)))
 
 
-def node_classify(state: AgentState, config: RunnableConfig | None=None) -> AgentState:
+def node_classify(state: AgentState, config: RunnableConfig | None=None) -> dict[str, Any]:
     cfg = get_config(config)
-    llm = make_llm(cfg)
+    warnings: list[str] = []
 
     areas = sorted({x["doc"]["area"] for x in state.retrieved if x.get("doc", {}).get("area")})
     if not areas:
         areas = Area.__args__
-        state.warnings.append("Could not infer areas from retrieval; using placeholder labels.")
+        warnings.append("Could not infer areas from retrieval; using placeholder labels.")
 
     retrieved_summaries = "\n\n".join(
         [
@@ -46,7 +47,8 @@ def node_classify(state: AgentState, config: RunnableConfig | None=None) -> Agen
 
     sys = SystemMessage(content=classifier_prompt(areas, retrieved_summaries))
     usr = HumanMessage(content=state.normalized_text[:7000])
-    raw = llm.invoke([sys, usr]).content
+    response = invoke_llm(cfg, [sys, usr])
+    raw = response.content
     raw_json = basic_parse_json(raw)
 
     rationale = ""
@@ -54,12 +56,19 @@ def node_classify(state: AgentState, config: RunnableConfig | None=None) -> Agen
     try:
         print(raw)
         parsed = ClassifierOut.model_validate(_safe_json_loads(raw_json))
-        parsed.area = ClassifierOut.validate_area(parsed.area, areas)
-        state.chosen_area = parsed.area
+        raw_area = parsed.area.strip()
+        chosen_area = ClassifierOut.validate_area(raw_area, areas)
         rationale = (parsed.rationale or "").strip()
+        # Only cache answers whose label was offered; a fallback label would be replayed as is
+        if raw_area in areas:
+            response.confirm()
     except (ValidationError, json.JSONDecodeError) as e:
-        state.warnings.append(f"Classifier JSON parse failed: {e}")
-        state.chosen_area = areas[0]
+        warnings.append(f"Classifier JSON parse failed: {e}")
+        chosen_area = areas[0]
 
     logger.info(f"Rationale: {rationale}")
-    return state
\ No newline at end of file
+    return {
+        "chosen_area": chosen_area,
+        "warnings": warnings,
+        "llm_debug": [{"node": "classify", "cached": response.cached}],
+    }
\ No newline at end of file
@@ -5,7 +5,8 @@ from agent.prompts import extraction_prompt
 from agent.state import AgentState
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-from agent.helper import get_config, make_llm, basic_parse_json, _safe_json_loads
+from agent.helper import get_config, basic_parse_json, _safe_json_loads
+from agent.llm import invoke_llm
 
 class ExtractionOut(BaseModel):
     """
@@ -70,20 +71,25 @@ class ExtractionOut(BaseModel):
         return set(payload.keys()) != expected
 
 
-def node_extract(state: AgentState, cfg: RunnableConfig | None=None) -> AgentState:
+def node_extract(state: AgentState, config: RunnableConfig | None=None) -> dict[str, Any]:
     
-    cfg = get_config(cfg)
-    llm = make_llm(cfg)
+    cfg = get_config(config)
+    warnings: list[str] = []
+    llm_debug: list[dict[str, Any]] = []
     sys = SystemMessage(content=extraction_prompt())
     usr = HumanMessage(content=state.normalized_text[:12000])
 
-    raw = llm.invoke([sys, usr]).content
+    response = invoke_llm(cfg, [sys, usr])
+    llm_debug.append({"node": "extract", "cached": response.cached})
+    raw = response.content
     raw_parsed = basic_parse_json(raw)
     try:
         data = _safe_json_loads(raw_parsed)
     except json.JSONDecodeError as e:
-        state.warnings.append(f"Extractor returned invalid JSON: {e}")
+        warnings.append(f"Extractor returned invalid JSON: {e}")
         data = {}
+    if not ExtractionOut.needs_repair(data):
+        response.confirm()
 
     if ExtractionOut.needs_repair(data):
         expected = ExtractionOut.expected_keys()
@@ -95,17 +101,21 @@ def node_extract(state: AgentState, cfg: RunnableConfig | None=None) -> AgentSta
         "Here is your previous output (may be invalid JSON). Convert it to valid JSON with the keys above:\n"
         f"{raw}"
     )
-        raw2 = llm.invoke([SystemMessage(content=repair_prompt)]).content
+        response = invoke_llm(cfg, [SystemMessage(content=repair_prompt)])
+        llm_debug.append({"node": "extract_repair", "cached": response.cached})
+        raw2 = response.content
         try:
             data = _safe_json_loads(raw2)
         except json.JSONDecodeError as e:
-            state.warnings.append(f"Extractor repair failed: {e}")
+            warnings.append(f"Extractor repair failed: {e}")
             data = {}
+        if not ExtractionOut.needs_repair(data):
+            response.confirm()
 
     try:
         extraction = ExtractionOut.coerce_and_validate(data)
-        state.extraction = extraction.data
+        extraction_data = extraction.data
     except ValidationError as e:
-        state.warnings.append(f"Extractor final validation failed: {e}")
-        state.extraction = ExtractionOut.coerce_and_validate({}).data
-    return state
\ No newline at end of file
+        warnings.append(f"Extractor final validation failed: {e}")
+        extraction_data = ExtractionOut.coerce_and_validate({}).data
+    return {"extraction": extraction_data, "warnings": warnings, "llm_debug": llm_debug}
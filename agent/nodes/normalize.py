@@ -1,3 +1,4 @@
+from functools import partial
 from typing import Any
 from agent.state import AgentState
 from langchain_core.runnables import RunnableConfig
@@ -11,45 +12,43 @@ def _safe_strip(x: Any) -> str:
 
 def node_normalize_input(
     state: AgentState, config: RunnableConfig | None = None
-) -> AgentState:
+) -> dict[str, Any]:
     """
     Normalize the user input into plain text.
 
     - text: uses the input as-is
     - pdf: uses pdf_ingestor(...) then clean_document(...)
     - url: uses url_ingestor(...) then clean_document(...)
+
+    Returns the normalized_text update and this node's warnings (appended to the state's by the graph).
     """
     cfg = get_config(config)
 
-    if getattr(state, "warnings", None) is None:
-        state.warnings = []
-
     input_kind = _safe_strip(getattr(state, "input_kind", "")).lower()
     input_value = _safe_strip(getattr(state, "input_value", ""))
 
     if not input_value:
-        state.warnings.append("Empty input_value; cannot normalize.")
-        state.normalized_text = ""
-        return state
+        return {"normalized_text": "", "warnings": ["Empty input_value; cannot normalize."]}
 
     if input_kind == "text":
-        state.normalized_text = input_value
-        return state
+        return {"normalized_text": input_value}
     if input_kind == "pdf":
         source = {"type": "pdf", "path": input_value}
         ingestor = pdf_ingestor
     elif input_kind == "url":
         source = {"type": "url", "url": input_value}
-        ingestor = url_ingestor
+        ingestor = partial(url_ingestor, html_extractor=cfg.html_extractor)
     else:
-        state.warnings.append(f"Unsupported input_kind={input_kind!r}; treating as text.")
-        state.normalized_text = input_value
-        return state
+        return {
+            "normalized_text": input_value,
+            "warnings": [f"Unsupported input_kind={input_kind!r}; treating as text."],
+        }
 
     doc_id = _safe_strip(getattr(state, "input_id", "")) or "input"
     title = _safe_strip(getattr(state, "input_title", "")) or doc_id
     area = _safe_strip(getattr(state, "area", "")) or "unknown"
 
+    warnings: list[str] = []
     try:
         document = ingestor(
             id=doc_id,
@@ -64,17 +63,14 @@ def node_normalize_input(
         text = text.strip()
 
         if not text:
-            state.warnings.append(
+            warnings.append(
                 f"{input_kind} ingestion produced empty text (id={doc_id})."
             )
 
-        state.normalized_text = text
-
-        return state
+        return {"normalized_text": text, "warnings": warnings}
 
     except Exception as exc: 
-        state.warnings.append(
+        warnings.append(
             f"Failed to ingest {input_kind} input (id={doc_id}): {exc!r}"
         )
-        state.normalized_text = ""
-        return state
+        return {"normalized_text": "", "warnings": warnings}
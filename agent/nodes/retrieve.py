@@ -1,36 +1,57 @@
 from typing import Any
-from agent.mcp_tools import get_article_content, search_articles
+from agent.mcp_tools import get_article_content_concurrent, get_articles_content, search_articles
 from agent.state import AgentState
 from langchain_core.runnables import RunnableConfig
 from agent.helper import get_config
 
-def node_retrieve(state: AgentState, config: RunnableConfig | None=None) -> AgentState:
+_SNIPPET_CHARS = 1200
+
+def node_retrieve(state: AgentState, config: RunnableConfig | None=None) -> dict[str, Any]:
     cfg = get_config(config)
+    warnings: list[str] = []
     query = (state.normalized_text[:1500] or "").strip( )
     if not query:
-        state.warnings.append("Empty normalized_text; cannot retrieve articles.")
-        state.retrieved = []
-        state.retrieval_debug = {"query": query, "hits": []}
-        return state
-    hits = search_articles(query=query, cfg=cfg)
+        return {
+            "retrieved": [],
+            "retrieval_debug": {"query": query, "hits": []},
+            "warnings": ["Empty normalized_text; cannot retrieve articles."],
+        }
+    hits = search_articles(query=query, cfg=cfg, max_snippets=cfg.retrieval_snippets)
     hits = hits[: cfg.top_k]
-    state.retrieval_debug = {"query": query, "hits": hits}
+    retrieval_debug = {"query": query, "hits": hits}
     enriched: list[dict[str, Any]] = []
-    for h in hits:
+    if cfg.retrieval_snippets > 0:
+        # The best-matching chunks came with the hits; no article content needs to be shipped
+        docs = [
+            {
+                "id": h["id"],
+                "title": h["title"],
+                "area": h["area"],
+                "content": "\n\n".join(snippet["text"] for snippet in h.get("snippets") or []),
+            }
+            for h in hits
+        ]
+    else:
         try:
-            doc = get_article_content(article_id=str(h["id"]), cfg=cfg)
-            enriched.append(
-                {
-                    "hit": h,
-                    "doc": {
-                        "id": doc.get("id"),
-                        "title": doc.get("title"),
-                        "area": doc.get("area"),
-                        "content_snippet": (doc.get("content") or "")[:1200],
-                    },
-                }
-            )
+            # Only the first _SNIPPET_CHARS are used: have the server send just that window
+            docs = get_articles_content(article_ids=[str(h["id"]) for h in hits], cfg=cfg, max_chars=_SNIPPET_CHARS) if hits else []
         except Exception as e:
-            state.warnings.append(f"Failed get_article_content for {h.get('id')}: {e}")
-    state.retrieved = enriched
-    return state
+            # One bad id fails the whole batch: fetch the articles concurrently, one call each, and skip only the failures
+            warnings.append(f"Failed get_articles_content for {[h.get('id') for h in hits]}: {e}")
+            docs = get_article_content_concurrent(article_ids=[str(h["id"]) for h in hits], cfg=cfg, max_chars=_SNIPPET_CHARS)
+    for h, doc in zip(hits, docs):
+        if isinstance(doc, Exception):
+            warnings.append(f"Failed get_article_content for {h.get('id')}: {doc}")
+            continue
+        enriched.append(
+            {
+                "hit": h,
+                "doc": {
+                    "id": doc.get("id"),
+                    "title": doc.get("title"),
+                    "area": doc.get("area"),
+                    "content_snippet": (doc.get("content") or "")[:_SNIPPET_CHARS],
+                },
+            }
+        )
+    return {"retrieved": enriched, "retrieval_debug": retrieval_debug, "warnings": warnings}
@@ -1,10 +1,12 @@
 import json
+from typing import Any
 from pydantic import BaseModel, Field, ValidationError, field_validator
 from agent.prompts import review_prompt
 from agent.state import AgentState
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-from agent.helper import get_config, make_llm
+from agent.helper import get_config
+from agent.llm import invoke_llm
 
 class ReviewOut(BaseModel):
     review_markdown: str = Field(default="")
@@ -57,15 +59,12 @@ def parse_review(raw: str) -> str:
         return raw[first:]
     return raw
 
-def node_review(state: AgentState, cfg: RunnableConfig | None=None) -> AgentState:
-    cfg = get_config(cfg)
-    llm = make_llm(cfg)
+def node_review(state: AgentState, config: RunnableConfig | None=None) -> dict[str, Any]:
+    cfg = get_config(config)
     sys = SystemMessage(content=review_prompt(state.chosen_area or "N/A"))
 
     if state.extraction is None:
-        state.warnings.append("No extraction data available for review.")
-        state.review_markdown = ""
-        return state
+        return {"review_markdown": "", "warnings": ["No extraction data available for review."]}
 
     usr = HumanMessage(
         content=(
@@ -76,13 +75,20 @@ def node_review(state: AgentState, cfg: RunnableConfig | None=None) -> AgentStat
         )
     )
 
-    raw = parse_review(llm.invoke([sys, usr]).content)
+    response = invoke_llm(cfg, [sys, usr])
+    raw = parse_review(response.content)
     raw_parsed = parse_review(raw)
+    warnings: list[str] = []
     try:
         review = ReviewOut.model_validate({"review_markdown": raw_parsed})
         raw_parsed = ReviewOut.ensure_min_sections(review.review_markdown)
+        if raw_parsed == review.review_markdown:  # already had the expected sections
+            response.confirm()
     except ValidationError as e:
-        state.warnings.append(f"Review validation failed: {e}")
+        warnings.append(f"Review validation failed: {e}")
         raw_parsed = ReviewOut.ensure_min_sections(raw_parsed)
-    state.review_markdown = raw_parsed
-    return state
\ No newline at end of file
+    return {
+        "review_markdown": raw_parsed,
+        "warnings": warnings,
+        "llm_debug": [{"node": "review", "cached": response.cached}],
+    }
\ No newline at end of file
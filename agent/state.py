@@ -1,5 +1,6 @@
+import operator
 from dataclasses import dataclass, field
-from typing import Any, Literal
+from typing import Annotated, Any, Literal
 
 InputKind = Literal["pdf", "url", "text"]
 ExtractionKeys = Literal[
@@ -22,5 +23,8 @@ class AgentState:
     review_markdown: str = ""
 
     # debug / hardening
-    warnings: list[str] = field(default_factory=list)
-    retrieval_debug: dict[str, Any] = field(default_factory=dict)
\ No newline at end of file
+    # Nodes return only their own warnings; the graph concatenates them (also across parallel branches)
+    warnings: Annotated[list[str], operator.add] = field(default_factory=list)
+    retrieval_debug: dict[str, Any] = field(default_factory=dict)
+    # One {"node", "cached"} entry per LLM call, concatenated like warnings
+    llm_debug: Annotated[list[dict[str, Any]], operator.add] = field(default_factory=list)
\ No newline at end of file
@@ -1,6 +1,7 @@
 # Save processed/#.jsonl, stats, manifest, etc. to processed_dir
 import json
-from typing import List
+import os
+from typing import Iterable, Iterator, List
 from indexer.types import Chunk
 
 def write_chunks_jsonl(doc_id: str, chunks: List[Chunk], processed_dir: str):
@@ -9,9 +10,17 @@ def write_chunks_jsonl(doc_id: str, chunks: List[Chunk], processed_dir: str):
         for chunk in chunks:
             f.write(json.dumps(chunk.model_dump()) + '\n')
 
-def append_document_stats(stats: dict, document, chunks: List[Chunk], warnings: List[str]):
+def iter_write_chunks_jsonl(doc_id: str, chunks: Iterable[Chunk], processed_dir: str) -> Iterator[Chunk]:
+    """Write chunks to the document jsonl as they pass through, for chunks produced lazily."""
+    jsonl_path = f"{processed_dir}/{doc_id}_chunks.jsonl"
+    with open(jsonl_path, 'w') as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk.model_dump()) + '\n')
+            yield chunk
+
+def append_document_stats(stats: dict, document, n_chunks: int, warnings: List[str]):
     stats[document.doc_id] = {
-        "n_chunks": len(chunks),
+        "n_chunks": n_chunks,
         "ingest_warnings": document.ingest_warnings,
         "ingest_stats": document.ingest_stats
     }
@@ -22,12 +31,44 @@ def append_manifest_json(manifest: dict, embedding_config: dict, chunking_config
     manifest["chunking_config"] = chunking_config
     manifest["vector_store_config"] = vector_store_config
 
+def append_manifest_documents(manifest: dict, documents: dict, config_fingerprint: str, index_version: str):
+    """Record per-document source fingerprints and the config fingerprint used by incremental runs,
+    and the version of the index written by this run (readers invalidate their caches when it changes)."""
+    manifest["config_fingerprint"] = config_fingerprint
+    manifest["documents"] = documents
+    manifest["index_version"] = index_version
+
 def write_stats_json(stats: dict, processed_dir: str):
     stats_path = f"{processed_dir}/stats.json"
     with open(stats_path, 'w') as f:
         json.dump(stats, f, indent=2)
 
+def write_embedding_cache_stats_json(cache_stats: dict, processed_dir: str):
+    # Separate from stats.json, whose keys are doc ids
+    cache_stats_path = f"{processed_dir}/embedding_cache_stats.json"
+    with open(cache_stats_path, 'w') as f:
+        json.dump(cache_stats, f, indent=2)
+
 def write_manifest_json(manifest: dict, processed_dir: str):
     manifest_path = f"{processed_dir}/manifest.json"
     with open(manifest_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
\ No newline at end of file
+        json.dump(manifest, f, indent=2)
+
+def read_stats_json(processed_dir: str) -> dict:
+    stats_path = f"{processed_dir}/stats.json"
+    if not os.path.exists(stats_path):
+        return {}
+    with open(stats_path, 'r') as f:
+        return json.load(f)
+
+def read_manifest_json(processed_dir: str) -> dict:
+    manifest_path = f"{processed_dir}/manifest.json"
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+def remove_chunks_jsonl(doc_id: str, processed_dir: str):
+    jsonl_path = f"{processed_dir}/{doc_id}_chunks.jsonl"
+    if os.path.exists(jsonl_path):
+        os.remove(jsonl_path)
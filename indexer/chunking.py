@@ -1,60 +1,295 @@
 # Receives Document and splits into list[Chunk], source agnostic
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, Optional
 from indexer.types import Chunk
 from indexer.types import Document
 
-def chunk_document(document: Document, chunk_size: int, chunk_overlap: int) -> list[Chunk]:
-    """Parses and chunks the given Document.
+_PAGE_SEPARATOR_LEN = 2  # "\n\n" added between pages during extraction
 
-    Args:
-        document (Document): The document to be chunked.
-        chunk_size (int): The size of each chunk.
-        chunk_overlap (int): The overlap between chunks.
+# A chunker yields (char_start, char_end) spans of the content: (content, chunk_size, chunk_overlap, tokenizer)
+Span = tuple[int, int]
+Chunker = Callable[[str, int, int, Any], Iterator[Span]]
 
-    Returns:
-        list[Chunk]: A list of chunks created from the document.
-    """
-    chunks = []
-    content = document.content
-    doc_id = document.doc_id
-    area = document.area
-    source_type = document.source_type
-    page_map = document.page_map
+CHUNKERS: dict[str, Chunker] = {}
 
-    char_start = 0
-    chunk_index = 0
+def register_chunker(name: str) -> Callable[[Chunker], Chunker]:
+    def decorator(fn: Chunker) -> Chunker:
+        CHUNKERS[name] = fn
+        return fn
+    return decorator
 
-    while char_start < len(content):
-        char_end = min(char_start + chunk_size, len(content))
-        chunk_text = content[char_start:char_end]
+def get_chunker(name: str) -> Chunker:
+    try:
+        return CHUNKERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown chunker {name!r}. Available: {sorted(CHUNKERS)}")
 
-        page_start = None
-        page_end = None
+@lru_cache(maxsize=4)
+def load_tokenizer(model_name: str):
+    """Tokenizer of the embedding model, loaded once per process."""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name)
+
+class _PageLocator:
+    """Maps character offsets of the document content to page indexes in O(log pages)."""
+    def __init__(self, page_map: list[dict]):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        self.page_idxs: list[int] = []
         accumulated_chars = 0
         for page in page_map:
             page_length = len(page["text"])
-            if accumulated_chars <= char_start < accumulated_chars + page_length:
-                page_start = page["page_idx"]
-            if accumulated_chars < char_end <= accumulated_chars + page_length:
-                page_end = page["page_idx"]
-            accumulated_chars += page_length + 2  # +2 for the "\n\n" added during extraction
+            self.starts.append(accumulated_chars)
+            self.ends.append(accumulated_chars + page_length)
+            self.page_idxs.append(page["page_idx"])
+            accumulated_chars += page_length + _PAGE_SEPARATOR_LEN
+
+    def page_of_start(self, char_start: int) -> Optional[int]:
+        """Page whose text contains char_start, i.e. start <= char_start < end."""
+        i = bisect_right(self.starts, char_start) - 1
+        if i >= 0 and char_start < self.ends[i]:
+            return self.page_idxs[i]
+        return None
+
+    def page_of_end(self, char_end: int) -> Optional[int]:
+        """Page whose text contains the exclusive char_end, i.e. start < char_end <= end."""
+        i = bisect_left(self.starts, char_end) - 1
+        if i >= 0 and char_end <= self.ends[i]:
+            return self.page_idxs[i]
+        return None
+
+def _split_spans(content: str, start: int, end: int, separator: re.Pattern) -> Iterator[Span]:
+    """Spans of content[start:end] between separator matches, skipping whitespace-only pieces."""
+    pos = start
+    for m in separator.finditer(content, start, end):
+        if m.start() > pos and not content[pos:m.start()].isspace():
+            yield pos, m.start()
+        pos = m.end()
+    if pos < end and not content[pos:end].isspace():
+        yield pos, end
+
+def _pack_spans(units: Iterator[Span], chunk_size: int, chunk_overlap: int) -> Iterator[Span]:
+    """Greedily merge consecutive units into spans of at most chunk_size chars.
+
+    Each new span starts with the trailing units of the previous one that fit in chunk_overlap.
+    Units are expected to be at most chunk_size chars long.
+    """
+    window: list[Span] = []
+    has_new = False
+    for unit in units:
+        if window and unit[1] - window[0][0] > chunk_size:
+            yield window[0][0], window[-1][1]
+            has_new = False
+            while window and window[-1][1] - window[0][0] > chunk_overlap:
+                window.pop(0)
+            while window and unit[1] - window[0][0] > chunk_size:
+                window.pop(0)
+        window.append(unit)
+        has_new = True
+    if window and has_new:
+        yield window[0][0], window[-1][1]
+
+@register_chunker("char")
+def _char_spans(content: str, chunk_size: int, chunk_overlap: int, tokenizer: Any = None) -> Iterator[Span]:
+    """Fixed windows of chunk_size characters, stepping chunk_size - chunk_overlap."""
+    char_start = 0
+    while char_start < len(content):
+        yield char_start, min(char_start + chunk_size, len(content))
+        char_start += chunk_size - chunk_overlap
+
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n{2,}")
+
+@register_chunker("sentence")
+def _sentence_spans(content: str, chunk_size: int, chunk_overlap: int, tokenizer: Any = None) -> Iterator[Span]:
+    """Whole sentences packed up to chunk_size characters; longer sentences fall back to char windows."""
+    def units() -> Iterator[Span]:
+        for start, end in _split_spans(content, 0, len(content), _SENTENCE_BOUNDARY_RE):
+            if end - start <= chunk_size:
+                yield start, end
+            else:
+                for s, e in _char_spans(content[start:end], chunk_size, chunk_overlap):
+                    yield start + s, start + e
+    return _pack_spans(units(), chunk_size, chunk_overlap)
+
+_RECURSIVE_SEPARATORS = [
+    re.compile(r"\n{2,}"),        # paragraphs
+    re.compile(r"\n"),            # lines
+    re.compile(r"(?<=[.!?])\s+"), # sentences
+    re.compile(r"\s+"),           # words
+]
+
+def _recursive_units(content: str, start: int, end: int, chunk_size: int, level: int) -> Iterator[Span]:
+    if end - start <= chunk_size:
+        if start < end and not content[start:end].isspace():
+            yield start, end
+        return
+    if level == len(_RECURSIVE_SEPARATORS):
+        for s in range(start, end, chunk_size):
+            yield s, min(s + chunk_size, end)
+        return
+    for s, e in _split_spans(content, start, end, _RECURSIVE_SEPARATORS[level]):
+        yield from _recursive_units(content, s, e, chunk_size, level + 1)
+
+@register_chunker("recursive")
+def _recursive_spans(content: str, chunk_size: int, chunk_overlap: int, tokenizer: Any = None) -> Iterator[Span]:
+    """Split by paragraphs, then lines, sentences and words until pieces fit, then pack up to chunk_size characters."""
+    return _pack_spans(_recursive_units(content, 0, len(content), chunk_size, 0), chunk_size, chunk_overlap)
 
-        chunk_id = f"{doc_id}::p{page_start}-{page_end}::c{chunk_index}"
+@register_chunker("tokenizer")
+def _tokenizer_spans(content: str, chunk_size: int, chunk_overlap: int, tokenizer: Any = None) -> Iterator[Span]:
+    """Windows of chunk_size tokens of the embedding model tokenizer, stepping chunk_size - chunk_overlap."""
+    if tokenizer is None:
+        raise ValueError("The 'tokenizer' chunker requires the embedding model tokenizer.")
+    offsets = tokenizer(
+        content, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )["offset_mapping"]
+    for i in range(0, len(offsets), chunk_size - chunk_overlap):
+        window = offsets[i:i+chunk_size]
+        yield window[0][0], window[-1][1]
+        if i + chunk_size >= len(offsets):
+            break
 
-        chunk = Chunk(
+class _ChunkBuilder:
+    """Builds the Chunks of one document: ids, token counts and the truncation warning."""
+    def __init__(self, document: Document, chunker: str, chunk_size: int, chunk_overlap: int, tokenizer: Any, max_tokens: Optional[int]):
+        self.document = document
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.span_fn = get_chunker(chunker)
+        # Tokens left for the text once the model adds its special tokens ([CLS], [SEP], ...)
+        self.token_limit = None
+        if tokenizer is not None and max_tokens is not None:
+            self.token_limit = max_tokens - tokenizer.num_special_tokens_to_add()
+            if chunker == "tokenizer":
+                chunk_size = min(chunk_size, self.token_limit)
+        if chunk_size - chunk_overlap <= 0:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size}).")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.chunk_index = 0
+        self.n_truncated = 0
+
+    def spans(self, content: str) -> Iterator[Span]:
+        return self.span_fn(content, self.chunk_size, self.chunk_overlap, self.tokenizer)
+
+    def build(self, chunk_text: str, char_start: int, char_end: int, page_start: Optional[int], page_end: Optional[int]) -> Chunk:
+        doc_id = self.document.doc_id
+        chunk_id = f"{doc_id}::p{page_start}-{page_end}::c{self.chunk_index}"
+        self.chunk_index += 1
+
+        if self.tokenizer is not None:
+            token_count = len(self.tokenizer(chunk_text, add_special_tokens=False, verbose=False)["input_ids"])
+        else:
+            token_count = len(chunk_text.split())
+        if self.token_limit is not None and token_count > self.token_limit:
+            self.n_truncated += 1
+
+        return Chunk(
             chunk_id=chunk_id,
             doc_id=doc_id,
-            area=area,
+            area=self.document.area,
             text=chunk_text,
             page_start=page_start,
             page_end=page_end,
-            source_uri=document.source_uri,
+            source_uri=self.document.source_uri,
             char_start=char_start,
             char_end=char_end,
-            token_count=len(chunk_text.split())
+            token_count=token_count
         )
-        chunks.append(chunk)
 
-        chunk_index += 1
-        char_start += chunk_size - chunk_overlap
+    def finish(self):
+        if self.n_truncated:
+            self.document.ingest_warnings.append(
+                f"{self.n_truncated} chunks exceed max_length={self.max_tokens} tokens and will be truncated by the embedder."
+            )
+
+def iter_chunks(
+    document: Document,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunker: str = "char",
+    tokenizer: Any = None,
+    max_tokens: Optional[int] = None,
+) -> Iterator[Chunk]:
+    """Lazily chunks the given Document, one Chunk at a time.
+
+    Args:
+        document (Document): The document to be chunked.
+        chunk_size (int): The size of each chunk, in tokens for the "tokenizer" chunker, in characters otherwise.
+        chunk_overlap (int): The overlap between chunks, in the same unit as chunk_size.
+        chunker (str): Name of a registered chunker ("char", "sentence", "recursive", "tokenizer").
+        tokenizer: Embedding model tokenizer. Used for token_count and required by the "tokenizer" chunker.
+        max_tokens (int | None): Embedding model max_length. Token windows are capped to fit it, and
+            chunks longer than it (which the model would truncate) are reported in ingest_warnings.
+
+    Yields:
+        Chunk: The chunks of the document, in order.
+    """
+    builder = _ChunkBuilder(document, chunker, chunk_size, chunk_overlap, tokenizer, max_tokens)
+    content = document.content
+    locator = _PageLocator(document.page_map)
+
+    for char_start, char_end in builder.spans(content):
+        yield builder.build(
+            content[char_start:char_end],
+            char_start,
+            char_end,
+            locator.page_of_start(char_start),
+            locator.page_of_end(char_end),
+        )
+    builder.finish()
 
-    return chunks
\ No newline at end of file
+def iter_chunks_from_pages(
+    document: Document,
+    pages: Iterable[dict],
+    chunk_size: int,
+    chunk_overlap: int,
+    chunker: str = "char",
+    tokenizer: Any = None,
+    max_tokens: Optional[int] = None,
+) -> Iterator[Chunk]:
+    """Streaming variant of iter_chunks over page_map entries that arrive one at a time.
+
+    Each page is chunked on its own, so chunks never span a page boundary and memory is bounded
+    by the largest page. char_start/char_end are offsets in the pages joined by "\n\n".
+    See iter_chunks for the arguments.
+    """
+    builder = _ChunkBuilder(document, chunker, chunk_size, chunk_overlap, tokenizer, max_tokens)
+    char_offset = 0
+    for page in pages:
+        text = page["text"]
+        for char_start, char_end in builder.spans(text):
+            yield builder.build(
+                text[char_start:char_end],
+                char_offset + char_start,
+                char_offset + char_end,
+                page["page_idx"],
+                page["page_idx"],
+            )
+        char_offset += len(text) + _PAGE_SEPARATOR_LEN
+    builder.finish()
+
+def chunk_document(
+    document: Document,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunker: str = "char",
+    tokenizer: Any = None,
+    max_tokens: Optional[int] = None,
+) -> list[Chunk]:
+    """Parses and chunks the given Document.
+
+    Args:
+        document (Document): The document to be chunked.
+        chunk_size (int): The size of each chunk.
+        chunk_overlap (int): The overlap between chunks.
+        chunker (str): Name of a registered chunker.
+        tokenizer: Embedding model tokenizer, see iter_chunks.
+        max_tokens (int | None): Embedding model max_length, see iter_chunks.
+
+    Returns:
+        list[Chunk]: A list of chunks created from the document.
+    """
+    return list(iter_chunks(document, chunk_size, chunk_overlap, chunker, tokenizer, max_tokens))
@@ -1,40 +1,64 @@
 import re
-from typing import Protocol
+from typing import Any, Iterable, Iterator, Protocol
 
 class HasContentAndWarnings(Protocol):
     content: str
     ingest_warnings: list[str]
 
-_WS_RE = re.compile(r"[ \t\f\v]+")
+# Control chars (< 32) are dropped except '\n' and '\t'; '\r' becomes '\n' and '\t' a space.
+_TRANSLATE_TABLE = {i: None for i in range(32)}
+_TRANSLATE_TABLE.update({ord("\n"): "\n", ord("\r"): "\n", ord("\t"): " "})
+
+_LINE_EDGE_WS_RE = re.compile(r"[^\S\n]*\n[^\S\n]*")
+_SPACES_RE = re.compile(r" {2,}")
 _MANY_NEWLINES_RE = re.compile(r"\n{3,}")
 
-def clean_document(document: HasContentAndWarnings) -> HasContentAndWarnings:
+def clean_text(text: str) -> str:
     """
-    Cleans document.content in-place and appends warnings to document.ingest_warnings.
-
-    Actions performed:
+    Deterministic text normalization, each step a single C-level pass over the text:
     - Normalize newlines to '\n'
     - Remove null bytes and other control chars that break JSON/DB
     - Collapse excessive whitespace while preserving paragraph breaks
-    - Ensure deterministic output
     """
-    text = document.content or ""
+    text = text.replace("\r\n", "\n").translate(_TRANSLATE_TABLE)
+    text = _LINE_EDGE_WS_RE.sub("\n", text)
+    text = _SPACES_RE.sub(" ", text)
+    text = _MANY_NEWLINES_RE.sub("\n\n", text)
+    return text.strip()
 
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+def clean_document(document: HasContentAndWarnings) -> HasContentAndWarnings:
+    """
+    Cleans document.content in-place and appends warnings to document.ingest_warnings.
+
+    See clean_text for the actions performed.
+    """
+    text = document.content or ""
 
     if "\x00" in text:
-        text = text.replace("\x00", "")
         document.ingest_warnings.append("Null bytes removed during cleaning.")
 
-    text = "".join(ch for ch in text if ch == "\n" or ch == "\t" or ord(ch) >= 32)
-    text = _WS_RE.sub(" ", text)
-    text = "\n".join(line.strip() for line in text.split("\n"))
-    text = _MANY_NEWLINES_RE.sub("\n\n", text)
-    text = text.strip()
-
-    document.content = text
+    document.content = clean_text(text)
 
     if not document.content:
         document.ingest_warnings.append("Document content is empty after cleaning.")
 
     return document
+
+def clean_pages(document: HasContentAndWarnings, pages: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    """
+    Streaming counterpart of clean_document: cleans each page_map entry's text as it arrives.
+    Warnings are appended to document.ingest_warnings; the empty-content check runs after the last page.
+    """
+    null_bytes_seen = False
+    all_empty = True
+    for page in pages:
+        text = page["text"] or ""
+        if "\x00" in text and not null_bytes_seen:
+            document.ingest_warnings.append("Null bytes removed during cleaning.")
+            null_bytes_seen = True
+        cleaned = clean_text(text)
+        all_empty = all_empty and not cleaned
+        yield {**page, "text": cleaned}
+
+    if all_empty:
+        document.ingest_warnings.append("Document content is empty after cleaning.")
@@ -0,0 +1,34 @@
+# Persistent embedding cache: float32 vectors in SQLite keyed by sha256(model config + text)
+import hashlib
+import numpy as np
+from indexer.sqlite_cache import SQLiteLRUCache
+
+class EmbeddingCache(SQLiteLRUCache):
+    """On-disk cache of embedding vectors with least-recently-used eviction by size.
+
+    Keys must include everything that changes the vector (see Embedder.cache_namespace),
+    so one cache file can safely be shared by several models and configs.
+    """
+    table = "embeddings"
+    value_columns = (("dim", "INTEGER"), ("vector", "BLOB"))
+    size_expr = "LENGTH(vector)"
+
+    def __init__(self, path: str, max_bytes: int | None = None):
+        super().__init__(path, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Return the cached vectors for the keys that are present and refresh their last_used."""
+        return {
+            key: np.frombuffer(blob, dtype=np.float32)
+            for key, (_dim, blob) in self._get_many(keys).items()
+        }
+
+    def put_many(self, vectors: dict[str, np.ndarray]):
+        self._put_many({
+            key: (int(vec.shape[-1]), np.ascontiguousarray(vec, dtype=np.float32).tobytes())
+            for key, vec in vectors.items()
+        })
@@ -2,9 +2,11 @@
 
 # 1) Embedding model setting
 import logging
+import numpy as np
 from pydantic import BaseModel
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
+from indexer.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
@@ -14,29 +16,68 @@ class EmbeddingConfig(BaseModel):
     batch_size: int
     max_length: int
     device: str
-    show_progress_bar: bool
+    show_progress_bar: bool = False  # not recorded in the manifest, so from_manifest relies on the default
 
 # 2) Embedding interface
 class Embedder:
-    """Embedder using SentenceTransformer model."""
-    def __init__(self, config: EmbeddingConfig):
+    """Embedder using SentenceTransformer model, optionally backed by an EmbeddingCache."""
+    def __init__(self, config: EmbeddingConfig, cache: EmbeddingCache | None = None):
         self.config = config
+        self.cache = cache
         self.model = SentenceTransformer(
             config.model_name, 
             device=config.device,
         )
         self.model.max_seq_length = self.config.max_length
 
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        """Embed a list of texts into vectors."""
-        embeddings = self.model.encode(
+    @property
+    def cache_namespace(self) -> str:
+        """Everything besides the text that determines a vector, used to key the embedding cache."""
+        return (
+            f"model={self.config.model_name}|max_length={self.config.max_length}"
+            f"|normalize={self.config.normalize_embeddings}"
+        )
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
             texts, 
             batch_size=self.config.batch_size, 
             normalize_embeddings=self.config.normalize_embeddings,
             show_progress_bar=self.config.show_progress_bar,
             convert_to_numpy=True,
         )
-        return embeddings.tolist()
+
+    def embed_array(self, texts: list[str], dtype: type = np.float32) -> np.ndarray:
+        """Embed texts into a C-contiguous (n_texts, dim) array.
+
+        Vectors stay in numpy end to end; pass dtype=np.float16 to halve memory when
+        the consumer tolerates reduced precision. Only texts missing from the cache are encoded.
+        """
+        if self.cache is None or not texts:
+            return np.ascontiguousarray(self._encode(texts), dtype=dtype)
+
+        keys = [EmbeddingCache.make_key(self.cache_namespace, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            encoded = self._encode(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), encoded))
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        embeddings = np.empty((len(keys), vectors[keys[0]].shape[-1]), dtype=dtype)
+        for i, key in enumerate(keys):
+            embeddings[i] = vectors[key]
+        return embeddings
+
+    def warm_up(self) -> None:
+        """Encode one dummy text so lazy model initialization is not paid by the first real request."""
+        self._encode(["warm up"])
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of texts into vectors, as nested lists. Prefer embed_array for large inputs."""
+        return self.embed_array(texts).tolist()
     
     def info(self) -> dict:
         """Return information about the embedding model."""
@@ -0,0 +1,57 @@
+# Fingerprints of sources and indexing config, used by incremental re-indexing
+import hashlib
+import json
+from typing import Any
+from indexer.sources.http import FetchResult, get_default_fetcher
+
+# Only the embedding settings that change the vectors; batch_size/device do not.
+_EMBEDDING_FINGERPRINT_KEYS = ("model_name", "embedding_dimension", "normalize_embeddings", "max_length")
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _url_validator(url: str, fetched: FetchResult | None = None) -> str:
+    """Change marker for a URL: hash of its body, through the fetcher so re-runs are conditional requests."""
+    resp = fetched if fetched is not None else get_default_fetcher().fetch(url)
+    return "sha256=" + hashlib.sha256(resp.content).hexdigest()
+
+
+def source_fingerprint(entry: dict[str, Any], fetched: FetchResult | None = None) -> str:
+    """Fingerprint a metadata entry: its source content plus the fields stored in chunk metadata.
+
+    Args:
+        entry (dict): One entry of metadata.json.
+        fetched (FetchResult | None): Response already fetched for a URL source, hashed instead of fetching it again.
+
+    Returns:
+        str: sha256 hex digest that changes whenever the entry must be re-indexed.
+    """
+    source = entry.get("source", {})
+    source_type = source.get("type")
+
+    h = hashlib.sha256()
+    h.update(json.dumps({"area": entry.get("area"), "source": source}, sort_keys=True).encode("utf-8"))
+    if source_type == "pdf":
+        h.update(_sha256_file(source["path"]).encode("utf-8"))
+    elif source_type == "url":
+        h.update(_url_validator(source["url"], fetched).encode("utf-8"))
+    elif source_type == "text":
+        pass  # inline content is already part of the source dict
+    else:
+        raise ValueError(f"Unsupported source type: {source_type}")
+    return h.hexdigest()
+
+
+def config_fingerprint(chunking_config: dict[str, Any], embedding_config: dict[str, Any]) -> str:
+    """Fingerprint the chunking config and the vector-affecting part of the embedding config."""
+    payload = {
+        "chunking_config": chunking_config,
+        "embedding_config": {k: embedding_config.get(k) for k in _EMBEDDING_FINGERPRINT_KEYS},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
@@ -1,13 +1,147 @@
 import os
 import json
-from indexer.sources.pdf import pdf_ingestor
+import multiprocessing
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator
+from indexer.sources.http import FetchResult, configure_default_fetcher
+from indexer.sources.pdf import pdf_ingestor, pdf_page_stream
 from indexer.sources.url import url_ingestor
 from indexer.sources.text import text_ingestor
-from indexer.artifacts import write_chunks_jsonl, append_document_stats, append_manifest_json, write_stats_json, write_manifest_json
-from indexer.chunking import chunk_document
-from indexer.cleaning import clean_document
+from indexer.artifacts import (
+    iter_write_chunks_jsonl, append_document_stats, append_manifest_json, append_manifest_documents,
+    write_stats_json, write_manifest_json, read_stats_json, read_manifest_json, remove_chunks_jsonl,
+    write_embedding_cache_stats_json,
+)
+from indexer.chunking import iter_chunks, iter_chunks_from_pages, load_tokenizer
+from indexer.cleaning import clean_document, clean_pages
 from indexer.embeddings import EmbeddingConfig, Embedder
-from indexer.store.chroma_store import initialize_chroma_collection, upsert_chunks
+from indexer.embedding_cache import EmbeddingCache
+from indexer.fingerprint import source_fingerprint, config_fingerprint
+from indexer.store.chroma_store import initialize_chroma_collection, delete_document_chunks, list_document_ids, ChunkUpsertBatcher
+from indexer.types import Chunk, Document
+
+def _load_previous_documents(processed_dir: str, config_fp: str, vector_store_config: dict) -> tuple[dict, dict]:
+    """Return (documents, stats) of the previous run if it is compatible with this one, else empty dicts."""
+    previous_manifest = read_manifest_json(processed_dir)
+    if previous_manifest.get("config_fingerprint") != config_fp:
+        return {}, {}
+    previous_store = previous_manifest.get("vector_store_config", {})
+    if any(previous_store.get(k) != vector_store_config[k] for k in ("chroma_dir", "collection_name")):
+        return {}, {}
+    previous_stats = read_stats_json(processed_dir)
+    previous_stats.pop("embedding_cache", None)  # cache counters were stored here by earlier versions
+    return previous_manifest.get("documents", {}), previous_stats
+
+def ingest_entry(entry: dict, html_extractor: str = "default", fetched: FetchResult | None = None) -> Document:
+    """Dispatch a metadata entry to the ingestor of its source type; fetched is the response of a URL source, if already fetched."""
+    source_type = entry.get("source", {}).get("type")
+    if source_type == "pdf":
+        ingestor = pdf_ingestor
+    elif source_type == "url":
+        ingestor = partial(url_ingestor, html_extractor=html_extractor, fetched=fetched)
+    elif source_type == "text":
+        ingestor = text_ingestor
+    else:
+        raise ValueError(f"Unsupported source type: {source_type}")
+    return ingestor(
+        id=entry["id"],
+        title=entry["title"],
+        area=entry["area"],
+        source=entry["source"]
+    )
+
+def prepare_document(
+    entry: dict,
+    chunking_config: dict,
+    tokenizer_name: str | None,
+    max_tokens: int | None,
+    http_config: dict | None = None,
+    fetched: FetchResult | None = None,
+) -> tuple[Document, Iterable[Chunk]]:
+    """Ingest, clean and chunk one metadata entry.
+
+    The chunks are returned as a lazy iterator, so they are written and queued for ChromaDB one
+    at a time. With chunking_config["stream_pdfs"], PDFs are also extracted and cleaned page by page.
+    http_config configures the URL fetcher of this process (worker processes start with the default one);
+    fetched is the response of a URL source fetched while fingerprinting it, so it is not fetched again.
+    """
+    if http_config is not None:
+        configure_default_fetcher(**http_config)
+
+    # Chunk the Document with the configured chunker, counting tokens with the embedding model tokenizer
+    tokenizer = load_tokenizer(tokenizer_name) if tokenizer_name else None
+    chunk_args = (
+        chunking_config["chunk_size"],
+        chunking_config["chunk_overlap"],
+        chunking_config["chunker"],
+        tokenizer,
+        max_tokens,
+    )
+
+    if chunking_config.get("stream_pdfs") and entry.get("source", {}).get("type") == "pdf":
+        document, pages = pdf_page_stream(
+            id=entry["id"],
+            title=entry["title"],
+            area=entry["area"],
+            source=entry["source"]
+        )
+        return document, iter_chunks_from_pages(document, clean_pages(document, pages), *chunk_args)
+
+    document = ingest_entry(entry, chunking_config.get("html_extractor", "default"), fetched)
+
+    # Clean the Document content
+    clean_document(document)
+
+    return document, iter_chunks(document, *chunk_args)
+
+def prepare_document_in_worker(
+    entry: dict,
+    chunking_config: dict,
+    tokenizer_name: str | None,
+    max_tokens: int | None,
+    http_config: dict | None = None,
+    fetched: FetchResult | None = None,
+) -> tuple[Document, list[Chunk]]:
+    """prepare_document for the ingestion worker processes, which must return picklable chunk lists."""
+    document, chunks = prepare_document(entry, chunking_config, tokenizer_name, max_tokens, http_config, fetched)
+    return document, list(chunks)
+
+def _iter_prepared_documents(work: Iterable, prepare_args: tuple, ingest_workers: int) -> Iterator:
+    """Yield (item, (document, chunks), error) for each (entry, fingerprint, fetched) item, in order.
+
+    With ingest_workers > 1 the entries are prepared in a process pool; at most
+    2 * ingest_workers prepared documents are in flight or waiting for the consumer.
+    Workers are spawned rather than forked since the parent already holds the torch model.
+    """
+    if ingest_workers <= 1:
+        for item in work:
+            try:
+                yield item, prepare_document(item[0], *prepare_args, fetched=item[2]), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    max_pending = 2 * ingest_workers
+    items = iter(work)
+    with ProcessPoolExecutor(max_workers=ingest_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque(
+            (item, pool.submit(prepare_document_in_worker, item[0], *prepare_args, fetched=item[2]))
+            for item in islice(items, max_pending)
+        )
+        while pending:
+            item, future = pending.popleft()
+            next_item = next(items, None)
+            if next_item is not None:
+                pending.append((next_item, pool.submit(prepare_document_in_worker, next_item[0], *prepare_args, fetched=next_item[2])))
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
 
 def run_indexing_pipeline(
     metadata_path: str,
@@ -18,87 +152,168 @@ def run_indexing_pipeline(
     chunk_overlap: int,
     embedding_config: dict,
     reset: bool,
+    incremental: bool = False,
+    ingest_workers: int = 1,
+    embed_buffer_chunks: int | None = None,
+    embed_buffer_tokens: int | None = None,
+    embedding_cache_path: str | None = None,
+    embedding_cache_max_mb: float | None = None,
+    chunker: str = "char",
+    stream_pdfs: bool = False,
+    html_extractor: str = "default",
+    http_cache_dir: str | None = None,
+    http_cache_max_mb: float | None = None,
+    url_workers: int = 8,
+    max_requests_per_host: int = 4,
 ):
-    
+
     # Load metadata from metadata_path
     with open(metadata_path, 'r') as f:
         metadata = json.load(f)
-    # Load embedding model
-    embedder = Embedder(EmbeddingConfig(**embedding_config))
+    # Load embedding model, backed by the on-disk embedding cache if one is configured
+    embedding_cache = None
+    if embedding_cache_path:
+        max_bytes = int(embedding_cache_max_mb * 1024 * 1024) if embedding_cache_max_mb else None
+        embedding_cache = EmbeddingCache(embedding_cache_path, max_bytes=max_bytes)
+    embedder = Embedder(EmbeddingConfig(**embedding_config), cache=embedding_cache)
 
     # Create ChromaDB collection at chroma_dir under collection_name
     os.makedirs(chroma_dir, exist_ok=True)
     os.makedirs(processed_dir, exist_ok=True)
 
     chroma_collection = initialize_chroma_collection(chroma_dir, collection_name, reset=reset)
+    batcher = ChunkUpsertBatcher(chroma_collection, embedder, max_chunks=embed_buffer_chunks, max_tokens=embed_buffer_tokens)
+
+    chunking_config = {
+        "chunker": chunker,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "stream_pdfs": stream_pdfs,
+        "html_extractor": html_extractor
+    }
+    vector_store_config = {
+        "type": "chroma",
+        "chroma_dir": chroma_dir,
+        "collection_name": collection_name,
+        "reset": reset,
+        "incremental": incremental
+    }
+    config_fp = config_fingerprint(chunking_config, embedder.info())
+
+    # In incremental mode, reuse fingerprints of the previous run (a reset or config change invalidates them all)
+    previous_documents, previous_stats = {}, {}
+    if incremental and not reset:
+        previous_documents, previous_stats = _load_previous_documents(processed_dir, config_fp, vector_store_config)
 
     # Initialize stats and manifest dict
     stats = {}
     manifest = {}
-    
-    # For each entry in metadata, determine source type (e.g., PDF, URL)
+    documents = {}
+    n_unchanged = 0
+
+    # One pooled HTTP fetcher per process; responses fetched during this run are reused without revalidation
+    http_config = {
+        "cache_dir": http_cache_dir,
+        "cache_max_bytes": int(http_cache_max_mb * 1024 * 1024) if http_cache_max_mb else None,
+        "max_per_host": max_requests_per_host,
+        "fresh_since": time.time(),
+    }
+    fetcher = configure_default_fetcher(**http_config)
+
+    # Prefetch URL sources concurrently into the HTTP cache; errors resurface when the entry is fingerprinted or ingested
+    urls = [entry["source"]["url"] for entry in metadata if entry.get("source", {}).get("type") == "url"]
+    if urls and http_cache_dir:
+        fetcher.fetch_many(urls, max_workers=url_workers)
+
+    # In incremental mode, fingerprint every entry and keep only the ones that need (re)indexing.
+    # A full rebuild indexes everything, so it skips fingerprinting (and its extra fetch of URL sources);
+    # its documents are recorded without a fingerprint and re-indexed by the next incremental run.
+    # Entries are fingerprinted lazily, as ingestion consumes them, and the response fetched for a URL
+    # source is handed to its ingestion: without the HTTP cache the URL is fetched once, and at most
+    # the bodies of the documents in flight are held in memory.
+    def iter_work() -> Iterator[tuple[dict, str | None, FetchResult | None]]:
+        nonlocal n_unchanged
+        for entry in metadata:
+            if not incremental:
+                yield entry, None, None
+                continue
+            fetched = None
+            try:
+                if entry.get("source", {}).get("type") == "url":
+                    fetched = fetcher.fetch(entry["source"]["url"])
+                fingerprint = source_fingerprint(entry, fetched)
+            except Exception as e:
+                print(f"Error processing entry {entry.get('id', 'unknown')}: {e}")
+                continue
+            previous = previous_documents.get(entry["id"])
+            if previous is not None and previous.get("fingerprint") == fingerprint:
+                documents[entry["id"]] = previous
+                if entry["id"] in previous_stats:
+                    stats[entry["id"]] = previous_stats[entry["id"]]
+                n_unchanged += 1
+                continue
+            yield entry, fingerprint, fetched
 
-    for entry in metadata:
+    # Ingest/clean/chunk in worker processes, embed and upsert here as results arrive
+    prepare_args = (chunking_config, embedder.config.model_name, embedder.config.max_length, http_config)
+    for (entry, fingerprint, _), prepared, error in _iter_prepared_documents(iter_work(), prepare_args, ingest_workers):
+        if error is not None:
+            print(f"Error processing entry {entry.get('id', 'unknown')}: {error}")
+            continue
+        document = None
         try:
-            source_type = entry.get("source", {}).get("type")
-            if source_type == "pdf":
-                document = pdf_ingestor(
-                    id=entry["id"],
-                    title=entry["title"],
-                    area=entry["area"],
-                    source=entry["source"]
-                )
-            elif source_type == "url":
-                document = url_ingestor(
-                    id=entry["id"],
-                    title=entry["title"],
-                    area=entry["area"],
-                    source=entry["source"]
-                )
-            elif source_type == "text":
-                document = text_ingestor(
-                    id=entry["id"],
-                    title=entry["title"],
-                    area=entry["area"],
-                    source=entry["source"]
-                )
-            else:
-                raise ValueError(f"Unsupported source type: {source_type}")
-
-            # Clean the Document content
-            clean_document(document)
-
-            # Chunk the Document into smaller Chunks using chunk_size and chunk_overlap
-            chunks = chunk_document(document, chunk_size, chunk_overlap)
-            if chunks == []:
+            document, chunks = prepared
+
+            # Drop chunks left over from a previous version of the document
+            if not reset:
+                delete_document_chunks(chroma_collection, document.doc_id)
+
+            # Save jsonl files to processed_dir for record-keeping and queue the Chunks for ChromaDB,
+            # in one pass so streamed chunks are never held in memory all at once
+            n_chunks = batcher.add(iter_write_chunks_jsonl(document.doc_id, chunks, processed_dir))
+            if n_chunks == 0:
                 document.ingest_warnings.append("No chunks were created from the document content.")
             warnings = document.ingest_warnings
 
-            # Store the Chunks into ChromaDB located at chroma_dir under collection_name
-            write_chunks_jsonl(document.doc_id, chunks, processed_dir)
-
-            # Save jsonl files to processed_dir for record-keepings
-            upsert_chunks(chroma_collection, chunks, embedder)
-        
             # Save stat + manifest files to processed_dir
-            append_document_stats(stats, document, chunks, warnings)
+            append_document_stats(stats, document, n_chunks, warnings)
+            documents[document.doc_id] = {"fingerprint": fingerprint, "n_chunks": n_chunks}
         except Exception as e:
             print(f"Error processing entry {entry.get('id', 'unknown')}: {e}")
+            if document is not None:
+                # A streamed document can fail after some of its chunks were queued or already flushed:
+                # drop them all rather than leave a partial document in the index
+                batcher.discard(document.doc_id)
+                delete_document_chunks(chroma_collection, document.doc_id)
+                remove_chunks_jsonl(document.doc_id, processed_dir)
             continue
 
+    # Upsert what is left in the buffer; documents from failed flushes are not recorded as indexed
+    batcher.flush()
+    for doc_id in batcher.failed_doc_ids:
+        documents.pop(doc_id, None)
+        stats.pop(doc_id, None)
+
+    # Remove documents that are no longer listed in metadata. The collection itself is the source of truth:
+    # the previous manifest is ignored after a config change, and full rebuilds do not read it at all
+    if not reset:
+        listed_ids = {entry.get("id") for entry in metadata}
+        for doc_id in (list_document_ids(chroma_collection) | previous_documents.keys()) - listed_ids:
+            delete_document_chunks(chroma_collection, doc_id)
+            remove_chunks_jsonl(doc_id, processed_dir)
+
+    if incremental:
+        print(f"Incremental indexing: {n_unchanged} unchanged, {len(documents) - n_unchanged} (re)indexed.")
+
     append_manifest_json(
         manifest=manifest,
         embedding_config=embedder.info(),
-        chunking_config={
-            "chunk_size": chunk_size,
-            "chunk_overlap": chunk_overlap
-        },
-        vector_store_config={
-            "type": "chroma",
-            "chroma_dir": chroma_dir,
-            "collection_name": collection_name,
-            "reset": reset
-        }
+        chunking_config=chunking_config,
+        vector_store_config=vector_store_config
     )
+    append_manifest_documents(manifest, documents, config_fp, index_version=uuid.uuid4().hex)
+    if embedding_cache is not None:
+        write_embedding_cache_stats_json(embedding_cache.stats(), processed_dir)
+        embedding_cache.close()
     write_stats_json(stats, processed_dir)
-    write_manifest_json(manifest, processed_dir)
\ No newline at end of file
+    write_manifest_json(manifest, processed_dir)
@@ -0,0 +1,258 @@
+# Pooled HTTP fetcher: shared connection pool, per-host concurrency limits, on-disk conditional-request cache
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_HEADERS: dict[str, str] = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.6 Safari/605.1.15"
+    )
+}
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    headers: CaseInsensitiveDict
+    content: bytes
+    fetched_at: float
+    from_cache: bool = False
+
+    def __post_init__(self):
+        # Header names are case-insensitive (servers/proxies may send "content-type", "etag", ...),
+        # and get_encoding_from_headers looks up "content-type"
+        if not isinstance(self.headers, CaseInsensitiveDict):
+            self.headers = CaseInsensitiveDict(self.headers)
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("Content-Type", "")
+
+    @property
+    def text(self) -> str:
+        encoding = get_encoding_from_headers(self.headers) or "utf-8"
+        try:
+            return self.content.decode(encoding, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+class HttpCache:
+    """Response bodies and validators (ETag/Last-Modified) on disk, one <sha256(url)>.json/.body pair per URL.
+
+    With max_bytes, the least recently used URLs (by the mtime of their .body, refreshed on every hit)
+    are pruned once the pairs grow past it. Several processes may share the directory: each one keeps
+    its own running total and rescans the directory before pruning.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int | None = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size_lock = threading.Lock()
+        self._size = sum(size for _, size, _ in self._entries()) if max_bytes is not None else 0
+
+    def _paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    @staticmethod
+    def _atomic_write(path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """(last used, size in bytes, key) of every cached URL."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".body"):
+                continue
+            key = name[:-len(".body")]
+            try:
+                body = os.stat(os.path.join(self.cache_dir, name))
+                meta_size = os.path.getsize(os.path.join(self.cache_dir, f"{key}.json"))
+            except FileNotFoundError:
+                continue
+            entries.append((body.st_mtime, body.st_size + meta_size, key))
+        return entries
+
+    def get(self, url: str) -> FetchResult | None:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                content = f.read()
+            if self.max_bytes is not None:
+                os.utime(body_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return FetchResult(
+            url=url,
+            status_code=meta["status_code"],
+            headers=CaseInsensitiveDict(meta["headers"]),
+            content=content,
+            fetched_at=meta["fetched_at"],
+            from_cache=True,
+        )
+
+    def put(self, result: FetchResult):
+        meta_path, body_path = self._paths(result.url)
+        meta = json.dumps({"status_code": result.status_code, "headers": dict(result.headers), "fetched_at": result.fetched_at}).encode("utf-8")
+        self._atomic_write(body_path, result.content)
+        self._atomic_write(meta_path, meta)
+        if self.max_bytes is not None:
+            with self._size_lock:
+                # Overwrites are counted twice; prune() rescans and corrects the total
+                self._size += len(result.content) + len(meta)
+                if self._size > self.max_bytes:
+                    self.prune()
+
+    def prune(self):
+        """Delete least recently used URLs until the cached pairs fit in max_bytes."""
+        if self.max_bytes is None:
+            return
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            # The .json goes first: a pair without it is a cache miss
+            for ext in ("json", "body"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, f"{key}.{ext}"))
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+
+class HttpFetcher:
+    """Thread-safe fetcher sharing one requests.Session (and its connection pool) across threads.
+
+    Args:
+        cache_dir (str | None): Directory of the HttpCache; None disables caching.
+        cache_max_bytes (int | None): Size past which the HttpCache prunes least recently used URLs.
+        max_per_host (int): Maximum concurrent requests to the same host.
+        pool_size (int): Connections kept alive per host by the session.
+        fresh_since (float | None): Cached responses fetched at or after this timestamp are served
+            without revalidation, so URLs prefetched earlier in the same run are not requested again.
+    """
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        cache_max_bytes: int | None = None,
+        max_per_host: int = 4,
+        pool_size: int = 16,
+        timeout: tuple[float, float] = (5, 25),
+        fresh_since: float | None = None,
+    ):
+        self.config = self.make_config(
+            cache_dir=cache_dir, cache_max_bytes=cache_max_bytes, max_per_host=max_per_host, pool_size=pool_size, timeout=timeout, fresh_since=fresh_since,
+        )
+        self.cache = HttpCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.fresh_since = fresh_since
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_limits: dict[str, threading.Semaphore] = {}
+        self._host_limits_lock = threading.Lock()
+
+    @classmethod
+    def make_config(cls, **kwargs: Any) -> dict[str, Any]:
+        """The constructor arguments with defaults filled in, to compare configs without building a fetcher."""
+        bound = inspect.signature(cls).bind(**kwargs)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def _host_limit(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.Semaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url: str) -> FetchResult:
+        """GET url, sending If-None-Match/If-Modified-Since when a cached copy exists."""
+        cached = self.cache.get(url) if self.cache else None
+        if cached is not None and self.fresh_since is not None and cached.fetched_at >= self.fresh_since:
+            return cached
+
+        headers = {}
+        if cached is not None:
+            if cached.headers.get("ETag"):
+                headers["If-None-Match"] = cached.headers["ETag"]
+            if cached.headers.get("Last-Modified"):
+                headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        with self._host_limit(url):
+            resp = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if resp.status_code == 304 and cached is not None:
+            cached.fetched_at = time.time()
+            self.cache.put(cached)
+            return cached
+
+        resp.raise_for_status()
+        result = FetchResult(
+            url=url,
+            status_code=resp.status_code,
+            headers=CaseInsensitiveDict(resp.headers),
+            content=resp.content,
+            fetched_at=time.time(),
+        )
+        if self.cache is not None:
+            self.cache.put(result)
+        return result
+
+    def fetch_many(self, urls: list[str], max_workers: int = 8) -> dict[str, FetchResult | Exception]:
+        """Fetch urls concurrently; failures are returned as the exception instead of raised."""
+        def fetch_or_error(url: str) -> FetchResult | Exception:
+            try:
+                return self.fetch(url)
+            except Exception as e:
+                return e
+
+        unique_urls = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            return dict(zip(unique_urls, pool.map(fetch_or_error, unique_urls)))
+
+
+_DEFAULT_FETCHER: HttpFetcher | None = None
+_DEFAULT_FETCHER_LOCK = threading.Lock()
+
+def get_default_fetcher() -> HttpFetcher:
+    global _DEFAULT_FETCHER
+    with _DEFAULT_FETCHER_LOCK:
+        if _DEFAULT_FETCHER is None:
+            _DEFAULT_FETCHER = HttpFetcher()
+        return _DEFAULT_FETCHER
+
+def configure_default_fetcher(**kwargs: Any) -> HttpFetcher:
+    """Replace the process-wide fetcher used by url_ingestor, unless it already has this config."""
+    global _DEFAULT_FETCHER
+    with _DEFAULT_FETCHER_LOCK:
+        if _DEFAULT_FETCHER is None or _DEFAULT_FETCHER.config != HttpFetcher.make_config(**kwargs):
+            _DEFAULT_FETCHER = HttpFetcher(**kwargs)
+        return _DEFAULT_FETCHER
@@ -1,83 +1,168 @@
 # Ler pdf, devolver Document com page_map
 from indexer.types import Document
-from typing import Dict, Literal
-from io import BytesIO
-from pypdf import PdfReader
+from typing import Any, Dict, Iterator, Literal
 import pymupdf
 import re
 
 _NONSPACE_RE = re.compile(r"\S")
+_PAGE_SEPARATOR = "\n\n"
 
-def extract_text_from_pdf_bytes(data: bytes) -> str:
-    reader = PdfReader(BytesIO(data))
-    parts = []
-    for page in reader.pages:
-        parts.append(page.extract_text() or "")
-    return "\n".join(parts)
+def _check_pdf(raw_doc: pymupdf.Document, label: str) -> pymupdf.Document:
+    if raw_doc.page_count == 0:
+        raise ValueError(f"PDF at {label} has zero pages.")
 
+    if raw_doc.is_encrypted:
+        raise ValueError(f"PDF at {label} is encrypted and cannot be processed.")
 
-def pdf_ingestor(id: str, title: str, area: str, source: Dict[Literal["type", "path"], str]) -> Document:
+    return raw_doc
 
-    # 1) preflight: check if file exists, is pdf, size limits, etc.
+
+def _open_pdf(source: Dict[Literal["type", "path"], str]) -> pymupdf.Document:
+    """Open the PDF and run the preflight checks: file exists, is pdf, has pages, is not encrypted."""
     try:
         raw_doc = pymupdf.open(source["path"])
     except FileNotFoundError:
         raise ValueError(f"PDF file not found at {source['path']}")
-    
+
     if source["type"] != "pdf":
         raise ValueError(f"File at {source['path']} is not a PDF.")
-    
-    if raw_doc.page_count == 0:
-        raise ValueError(f"PDF at {source['path']} has zero pages.")
 
-    if raw_doc.is_encrypted:
-        raise ValueError(f"PDF at {source['path']} is encrypted and cannot be processed.")
+    return _check_pdf(raw_doc, source["path"])
+
+
+def _open_pdf_bytes(data: bytes, label: str) -> pymupdf.Document:
+    """Open an in-memory PDF (e.g. downloaded from a URL) and run the same preflight checks."""
+    try:
+        raw_doc = pymupdf.open(stream=data, filetype="pdf")
+    except (pymupdf.FileDataError, RuntimeError) as e:
+        raise ValueError(f"Content at {label} is not a valid PDF: {e}")
+    return _check_pdf(raw_doc, label)
+
 
+def iter_pdf_pages(raw_doc: pymupdf.Document) -> Iterator[Dict[str, Any]]:
+    """Yield one page_map entry per page; pages are loaded and extracted one at a time."""
+    for i, page in enumerate(raw_doc, start=1):
+        page_content = page.get_text()
+        assert isinstance(page_content, str)
+        nonspace = len(_NONSPACE_RE.findall(page_content))
+        yield {"page_idx": i, "text": page_content, "char_count": len(page_content), "nonspace_char_count": nonspace}
+
+
+class _PdfTextStats:
+    """Running counters over extracted pages, equal to the ones computed on the joined text."""
+    def __init__(self):
+        self.n_extracted_pages = 0
+        self.n_chars = 0
+        self.n_non_ascii = 0
+        self.n_nonspace = 0
+        self.all_blank = True
+
+    def add(self, page_text: str, nonspace_char_count: int):
+        if self.n_extracted_pages:
+            self.n_chars += len(_PAGE_SEPARATOR)
+        self.n_extracted_pages += 1
+        self.n_chars += len(page_text)
+        self.n_non_ascii += len(page_text) - len(page_text.encode("ascii", "ignore"))
+        self.n_nonspace += nonspace_char_count
+        self.all_blank = self.all_blank and not page_text.strip()
+
+    def finalize(self, n_pages: int, ingest_stats: dict, ingest_warnings: list[str]):
+        # 3) Quality checks: empty pdf, scanned pdf (no text), etc.
+        ingest_stats["n_pages"] = n_pages
+        ingest_stats["n_chars"] = self.n_chars
+        ingest_stats["n_extracted_pages"] = self.n_extracted_pages
+        ingest_stats["non_ascii_ratio"] = self.n_non_ascii / max(1, self.n_chars)
+
+        if self.all_blank:
+            ingest_warnings.append("Low text content in PDF.")
+        if self.n_extracted_pages == 0:
+            ingest_warnings.append("PDF has no extractable text.")
+        if self.all_blank:
+            ingest_warnings.append("PDF appears to be scanned or image-only, no text extracted.")
+        if self.n_chars == 0 or self.n_nonspace < 200:
+            ingest_warnings.append("PDF extraction produced very little text content.")
+        # 4) Fallback strategies: OCR?
+        if "Low text content in PDF." in ingest_warnings or "PDF appears to be scanned or image-only, no text extracted." in ingest_warnings:
+            ingest_warnings.append("Consider using OCR to extract text from scanned PDFs.")
+
+
+def _build_pdf_document(raw_doc: pymupdf.Document, id: str, title: str, area: str, source_type: Literal["pdf", "url"], source_uri: str) -> Document:
     ingest_warnings = []
     ingest_stats = {}
 
     # 2) read pdf, extract text per page
     page_map = []
-    i = 1
-    for page in raw_doc:
-        page_content = page.get_text()
-        assert isinstance(page_content, str)
-        nonspace = len(_NONSPACE_RE.findall(page_content))
-        page_number = i
-        page_map.append({"page_idx": page_number, "text": page_content, "char_count": len(page_content), "nonspace_char_count": nonspace})
-        i += 1
-    extracted_text = "\n\n".join([p["text"] for p in page_map])
-
-    # 3) Quality checks: empty pdf, scanned pdf (no text), etc.
-    ingest_stats["n_pages"] = raw_doc.page_count
-    ingest_stats["n_chars"] = len(extracted_text)
-    ingest_stats["n_extracted_pages"] = len(page_map)
-    # ingest_stats["chars_per_page"] = {k: len(v) for k, v in page_map.items()}
-    ingest_stats["non_ascii_ratio"] = sum(1 for c in extracted_text if ord(c) > 127) / max(1, len(extracted_text))
-    
-    if len(extracted_text.strip()) == 0:
-        ingest_warnings.append("Low text content in PDF.")
-    if len(page_map) == 0:
-        ingest_warnings.append("PDF has no extractable text.")
-    if all(len(p["text"].strip()) == 0 for p in page_map):
-        ingest_warnings.append("PDF appears to be scanned or image-only, no text extracted.")
-    if not extracted_text or sum(p["nonspace_char_count"] for p in page_map) < 200:
-        ingest_warnings.append("PDF extraction produced very little text content.")
-    # 4) Fallback strategies: OCR?
-    if "Low text content in PDF." in ingest_warnings or "PDF appears to be scanned or image-only, no text extracted." in ingest_warnings:
-        ingest_warnings.append("Consider using OCR to extract text from scanned PDFs.")
-    
+    stats = _PdfTextStats()
+    for page in iter_pdf_pages(raw_doc):
+        stats.add(page["text"], page["nonspace_char_count"])
+        page_map.append(page)
+    extracted_text = _PAGE_SEPARATOR.join([p["text"] for p in page_map])
+    stats.finalize(raw_doc.page_count, ingest_stats, ingest_warnings)
+
     # 5) build document
     document = Document(
         doc_id=id,
         title=title,
         area=area,
-        source_type="pdf",
-        source_uri=source["path"],
+        source_type=source_type,
+        source_uri=source_uri,
         content=extracted_text,
         page_map=page_map,
         ingest_warnings=ingest_warnings,
         ingest_stats=ingest_stats
     )
 
-    return document
\ No newline at end of file
+    return document
+
+
+def pdf_ingestor(id: str, title: str, area: str, source: Dict[Literal["type", "path"], str]) -> Document:
+
+    # 1) preflight: check if file exists, is pdf, size limits, etc.
+    raw_doc = _open_pdf(source)
+    try:
+        return _build_pdf_document(raw_doc, id, title, area, "pdf", source["path"])
+    finally:
+        raw_doc.close()
+
+
+def pdf_bytes_ingestor(id: str, title: str, area: str, data: bytes, source_uri: str) -> Document:
+    """Same as pdf_ingestor for a PDF downloaded from source_uri: same page_map, stats and warnings."""
+    raw_doc = _open_pdf_bytes(data, source_uri)
+    try:
+        return _build_pdf_document(raw_doc, id, title, area, "url", source_uri)
+    finally:
+        raw_doc.close()
+
+
+def pdf_page_stream(id: str, title: str, area: str, source: Dict[Literal["type", "path"], str]) -> tuple[Document, Iterator[Dict[str, Any]]]:
+    """Streaming variant of pdf_ingestor for very large PDFs.
+
+    Returns a Document with empty content and the iterator of its pages. Pages are extracted
+    lazily and never joined; document.page_map collects per-page stats without the text, and
+    ingest_stats/ingest_warnings are filled in once the iterator is exhausted.
+    """
+    raw_doc = _open_pdf(source)
+    document = Document(
+        doc_id=id,
+        title=title,
+        area=area,
+        source_type="pdf",
+        source_uri=source["path"],
+        content="",
+        page_map=[],
+        ingest_warnings=[],
+        ingest_stats={}
+    )
+
+    def pages() -> Iterator[Dict[str, Any]]:
+        stats = _PdfTextStats()
+        try:
+            for page in iter_pdf_pages(raw_doc):
+                stats.add(page["text"], page["nonspace_char_count"])
+                document.page_map.append({k: v for k, v in page.items() if k != "text"})
+                yield page
+            stats.finalize(raw_doc.page_count, document.ingest_stats, document.ingest_warnings)
+        finally:
+            raw_doc.close()
+
+    return document, pages()
@@ -0,0 +1,136 @@
+# Shared storage of the on-disk caches: one SQLite table of entries keyed by sha256 hex digests
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite limits the number of bound parameters per statement
+_MAX_PARAMS = 500
+
+class SQLiteLRUCache:
+    """SQLite table of cache entries with an optional TTL and least-recently-used eviction by size.
+
+    Subclasses name the table, declare its value columns and the SQL expression of an entry's size
+    in bytes, and (de)serialize their values from the rows of _get_many/_put_many.
+    A cache can be shared between threads.
+    """
+    table: str
+    value_columns: tuple[tuple[str, str], ...]  # (name, SQL type)
+    size_expr: str
+
+    def __init__(self, path: str, max_bytes: int | None = None, ttl_s: float | None = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{name} {sql_type} NOT NULL" for name, sql_type in self.value_columns)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            f"key TEXT PRIMARY KEY, {columns}, created REAL NOT NULL DEFAULT 0, last_used REAL NOT NULL)"
+        )
+        # Cache files written before entries recorded their creation time
+        if "created" not in {row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")}:
+            self._conn.execute(f"ALTER TABLE {self.table} ADD COLUMN created REAL NOT NULL DEFAULT 0")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+        self._conn.commit()
+
+    def _get_many(self, keys: list[str]) -> dict[str, tuple]:
+        """Return the value columns of the keys that are present and not older than ttl_s, and refresh their last_used."""
+        unique_keys = list(dict.fromkeys(keys))
+        names = ", ".join(name for name, _ in self.value_columns)
+        found: dict[str, tuple] = {}
+        expired: list[tuple[str]] = []
+        with self._lock:
+            now = time.time()
+            for i in range(0, len(unique_keys), _MAX_PARAMS):
+                batch = unique_keys[i:i+_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, created, {names} FROM {self.table} WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, created, *values in rows:
+                    if self.ttl_s is not None and now - created > self.ttl_s:
+                        expired.append((key,))
+                    else:
+                        found[key] = tuple(values)
+
+            if expired:
+                self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", expired)
+                self.expired += len(expired)
+            if found:
+                self._conn.executemany(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            if expired or found:
+                self._conn.commit()
+
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def _put_many(self, rows: dict[str, tuple]):
+        if not rows:
+            return
+        names = ", ".join(name for name, _ in self.value_columns)
+        placeholders = ", ".join("?" * (len(self.value_columns) + 3))
+        with self._lock:
+            now = time.time()
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {names}, created, last_used) VALUES ({placeholders})",
+                [(key, *values, now, now) for key, values in rows.items()],
+            )
+            self._conn.commit()
+            self.evict()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COALESCE(SUM({self.size_expr}), 0) FROM {self.table}").fetchone()[0]
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until the rest fit in max_bytes."""
+        with self._lock:
+            if self.ttl_s is not None:
+                cur = self._conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (time.time() - self.ttl_s,))
+                self.expired += cur.rowcount
+            if self.max_bytes is not None:
+                excess = self.size_bytes() - self.max_bytes
+                while excess > 0:
+                    rows = self._conn.execute(
+                        f"SELECT key, {self.size_expr} FROM {self.table} ORDER BY last_used LIMIT ?", (_MAX_PARAMS,)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    victims = []
+                    for key, size in rows:
+                        victims.append((key,))
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+                    self.evictions += len(victims)
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "n_entries": self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0],
+                "size_bytes": self.size_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -2,7 +2,7 @@
 
 import chromadb
 from chromadb.config import Settings
-from typing import List
+from typing import Iterable, List
 from indexer.types import Chunk
 
 def initialize_chroma_collection(chroma_dir: str, collection_name: str, reset: bool):
@@ -12,16 +12,43 @@ def initialize_chroma_collection(chroma_dir: str, collection_name: str, reset: b
     collection = client.get_or_create_collection(name=collection_name)
     return collection
 
+def delete_document_chunks(chroma_collection, doc_id: str) -> int:
+    """Delete every chunk of doc_id from the collection. Returns the number of deleted chunks."""
+    stale_ids = chroma_collection.get(where={"doc_id": doc_id}, include=[])["ids"]
+    if stale_ids:
+        chroma_collection.delete(ids=stale_ids)
+    return len(stale_ids)
+
+def list_document_ids(chroma_collection, page_size: int = 10000) -> set[str]:
+    """Return the doc_id of every chunk in the collection, reading the chunk metadata page by page."""
+    doc_ids = set()
+    offset = 0
+    while True:
+        page = chroma_collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        doc_ids.update(m["doc_id"] for m in page["metadatas"] or [] if m and m.get("doc_id"))
+        if len(page["ids"]) < page_size:
+            return doc_ids
+        offset += page_size
+
 def upsert_chunks(
     chroma_collection,
     chunks: List[Chunk],
     embedder,
+    write_batch_size: int = 1024,
 ):
-    batch_size = 32
-    for i in range(0, len(chunks), batch_size):
-        batch_chunks = chunks[i:i+batch_size]
+    """Embed chunks in one length-sorted pass, then write them to Chroma in write_batch_size slices.
+
+    Sorting by text length keeps similarly sized texts in the same encode batch, so
+    less padding is computed; encode itself batches by embedder.config.batch_size.
+    """
+    if not chunks:
+        return
+    chunks = sorted(chunks, key=lambda chunk: len(chunk.text))
+    embeddings = embedder.embed_array([chunk.text for chunk in chunks])
+
+    for i in range(0, len(chunks), write_batch_size):
+        batch_chunks = chunks[i:i+write_batch_size]
         texts = [chunk.text for chunk in batch_chunks]
-        embeddings = embedder.embed_texts(texts)
         ids = [chunk.chunk_id for chunk in batch_chunks]
         metadatas = [
             {
@@ -40,9 +67,57 @@ def upsert_chunks(
             }
             for chunk in batch_chunks
         ]
-        chroma_collection.add(
+        chroma_collection.upsert(
             ids=ids,
-            embeddings=embeddings,
+            embeddings=embeddings[i:i+write_batch_size],
             metadatas=metadatas,
             documents=texts
-        )
\ No newline at end of file
+        )
+
+class ChunkUpsertBatcher:
+    """Accumulates chunks across documents and upserts them once a chunk or token budget is reached.
+
+    Many short documents would otherwise each produce a tiny encode call. Documents whose
+    chunks were in a failed flush are collected in failed_doc_ids.
+    """
+    def __init__(self, chroma_collection, embedder, max_chunks: int | None = None, max_tokens: int | None = None):
+        self.chroma_collection = chroma_collection
+        self.embedder = embedder
+        self.max_chunks = max_chunks or embedder.config.batch_size * 16
+        self.max_tokens = max_tokens
+        self.failed_doc_ids: set[str] = set()
+        self._pending: List[Chunk] = []
+        self._pending_tokens = 0
+
+    def add(self, chunks: Iterable[Chunk]) -> int:
+        """Queue chunks (any iterable, consumed lazily) and return how many were added."""
+        n_added = 0
+        for chunk in chunks:
+            self._pending.append(chunk)
+            self._pending_tokens += chunk.token_count
+            n_added += 1
+            if len(self._pending) >= self.max_chunks or (
+                self.max_tokens is not None and self._pending_tokens >= self.max_tokens
+            ):
+                self.flush()
+        return n_added
+
+    def discard(self, doc_id: str) -> int:
+        """Drop the pending chunks of doc_id, e.g. when its chunk stream failed partway. Returns how many were dropped."""
+        kept = [chunk for chunk in self._pending if chunk.doc_id != doc_id]
+        n_dropped = len(self._pending) - len(kept)
+        if n_dropped:
+            self._pending = kept
+            self._pending_tokens = sum(chunk.token_count for chunk in kept)
+        return n_dropped
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_tokens = self._pending, [], 0
+        try:
+            upsert_chunks(self.chroma_collection, pending, self.embedder)
+        except Exception as e:
+            doc_ids = sorted({chunk.doc_id for chunk in pending})
+            print(f"Error upserting chunks of {doc_ids}: {e}")
+            self.failed_doc_ids.update(doc_ids)
@@ -2,17 +2,18 @@ from importlib import metadata
 import os
 import sys
 import logging
+import threading
+import time
 from webbrowser import get
+_IMPORT_STARTED = time.perf_counter()
 from fastmcp import FastMCP
 from pathlib import Path
 from mcp_server.storage import AppState, init_state
-from mcp_server.tools import SearchHit, ArticleContent, get_article_content_impl, search_articles_impl
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stderr
+from mcp_server.tools import (
+    SearchHit, ArticleContent, get_article_content_impl, get_articles_content_impl,
+    search_articles_impl, search_articles_batch_impl,
 )
+_IMPORT_S = time.perf_counter() - _IMPORT_STARTED  # fastmcp, chromadb and sentence-transformers
 
 logger = logging.getLogger(__name__)
 
@@ -26,55 +27,149 @@ def _log_startup_config() -> None:
     logger.info("Config: CHROMA_DIR=%s", chroma_dir)
     logger.info("Config: COLLECTION_NAME=%s", collection_name)
     logger.info("Config: PROCESSED_DIR=%s", processed_dir)
-    
+
 
 mcp = FastMCP(
     name="mcp-server"
 )
 
 _STATE: AppState | None = None
+_STATE_LOCK = threading.Lock()
 
 def _get_state() -> AppState:
     global _STATE
-    if _STATE is None:
+    with _STATE_LOCK:
+        if _STATE is not None:
+            return _STATE
         chroma_dir = Path(os.getenv("CHROMA_DIR", "data/chroma"))
         collection_name = os.getenv("COLLECTION_NAME", "aaa")
         metadata_path = Path(os.getenv("ARTICLES_DIR", "data/articles")) / "metadata.json"
         manifest_path = Path(os.getenv("MANIFEST_PATH", "data/processed/manifest.json"))
+        query_cache_ttl_s = os.getenv("QUERY_CACHE_TTL_S")
         _STATE = init_state(
             chroma_dir=chroma_dir,
             collection_name=collection_name,
             metadata_path=metadata_path,
             manifest_path=manifest_path,
+            query_cache_size=int(os.getenv("QUERY_CACHE_SIZE", "1024")),
+            query_cache_ttl_s=float(query_cache_ttl_s) if query_cache_ttl_s else None,
+            content_cache_size=int(os.getenv("CONTENT_CACHE_SIZE", "256")),
+            aggregator=os.getenv("SEARCH_AGGREGATOR", "max"),
         )
-    return _STATE
+        return _STATE
+
+def warm_start() -> AppState:
+    """Load the collection and warm the embedding model before serving, and log the timings.
+
+    The client's session initialize waits for this, so the first tool call is not bounded by model loading.
+    """
+    t0 = time.perf_counter()
+    state = _get_state()
+    timings = {"import_s": _IMPORT_S, **state.load_timings}
+    logger.info(
+        "MCP server ready in %.2fs (%s)",
+        _IMPORT_S + time.perf_counter() - t0,
+        ", ".join(f"{k}={v:.2f}" for k, v in timings.items()),
+    )
+    return state
 
 @mcp.tool
-def search_articles(query: str) -> list[SearchHit]:
+def search_articles(
+    query: str,
+    max_snippets: int = 0,
+    area: str | None = None,
+    doc_ids: list[str] | None = None,
+) -> list[SearchHit]:
     """Search the indexed articles by similarity.
 
     Args:
         query (str): The search query string.
+        max_snippets (int): Best-matching chunk texts (with page/char spans) returned per hit; 0 returns none.
+        area (str | None): Only search articles of this area.
+        doc_ids (list[str] | None): Only search these articles.
 
     Returns:
         list[SearchHit]: Doc-level search hits.
     """
     state = _get_state()
-    return search_articles_impl(state, query)
+    hits = search_articles_impl(state, query, max_snippets=max_snippets, area=area, doc_ids=doc_ids)
+    if state.query_cache is not None:
+        logger.debug("Query embedding cache: %s", state.query_cache.stats())
+    return hits
 
 @mcp.tool
-def get_article_content(id: str) -> ArticleContent:
+def get_article_content(id: str, max_chars: int = 40000, offset: int = 0) -> ArticleContent:
     """Retrieve content for a given document id.
 
     Args:
         id (str): The document id.
+        max_chars (int): Maximum number of characters of content, cut at a chunk boundary.
+        offset (int): Position in the full content to start from, e.g. the next_offset of a previous call.
 
     Returns:
         ArticleContent: The content of the article.
     """
     state = _get_state()
-    return get_article_content_impl(state, id)
+    content = get_article_content_impl(state, id, max_chars=max_chars, offset=offset)
+    if state.content_cache is not None:
+        logger.debug("Article content cache: %s", state.content_cache.stats())
+    return content
+
+@mcp.tool
+def search_articles_batch(
+    queries: list[str],
+    max_snippets: int = 0,
+    area: str | None = None,
+    doc_ids: list[str] | None = None,
+) -> list[list[SearchHit]]:
+    """Search the indexed articles for several queries at once.
+
+    Args:
+        queries (list[str]): The search query strings.
+        max_snippets (int): Best-matching chunk texts returned per hit, see search_articles.
+        area (str | None): Only search articles of this area, for every query.
+        doc_ids (list[str] | None): Only search these articles, for every query.
+
+    Returns:
+        list[list[SearchHit]]: Doc-level search hits of each query, in order.
+    """
+    state = _get_state()
+    hits = search_articles_batch_impl(state, queries, max_snippets=max_snippets, area=area, doc_ids=doc_ids)
+    if state.query_cache is not None:
+        logger.debug("Query embedding cache: %s", state.query_cache.stats())
+    return hits
+
+@mcp.tool
+def get_articles_content(ids: list[str], max_chars: int = 40000, offset: int = 0) -> list[ArticleContent]:
+    """Retrieve the content of several documents at once.
+
+    Args:
+        ids (list[str]): The document ids.
+        max_chars (int): Maximum number of characters of content per document, see get_article_content.
+        offset (int): Position in each full content to start from, see get_article_content.
+
+    Returns:
+        list[ArticleContent]: The content of each article, in order.
+    """
+    state = _get_state()
+    contents = get_articles_content_impl(state, ids, max_chars=max_chars, offset=offset)
+    if state.content_cache is not None:
+        logger.debug("Article content cache: %s", state.content_cache.stats())
+    return contents
 
 if __name__ == "__main__":
+    # Configured here rather than at import, so the agent's "inprocess" transport keeps its own logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
     _log_startup_config()
-    mcp.run()
\ No newline at end of file
+    # MCP_EAGER_LOAD=0 restores lazy loading on the first tool call
+    if os.getenv("MCP_EAGER_LOAD", "1") != "0":
+        warm_start()
+    mcp.run()
+    if _STATE is not None and _STATE.query_cache is not None:
+        logger.info("Query embedding cache: %s", _STATE.query_cache.stats())
+    if _STATE is not None and _STATE.content_cache is not None:
+        logger.info("Article content cache: %s", _STATE.content_cache.stats())
\ No newline at end of file
@@ -1,9 +1,18 @@
+import hashlib
 import json
-from dataclasses import dataclass
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Hashable
 from indexer.embeddings import EmbeddingConfig, Embedder
 import chromadb
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 @dataclass(frozen=True)
 class DocMeta:
@@ -11,11 +20,143 @@ class DocMeta:
     area: str
     source_uri: str | None = None
 
+class LRUCache:
+    """Thread-safe LRU with an optional TTL and hit/miss counters.
+
+    Args:
+        max_entries (int): Least recently used entries are evicted beyond this size.
+        ttl_s (float | None): Entries older than this are treated as misses; None keeps them until evicted.
+    """
+    def __init__(self, max_entries: int = 1024, ttl_s: float | None = None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_s is not None and time.monotonic() - entry[0] > self.ttl_s:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+class QueryEmbeddingCache(LRUCache):
+    """LRUCache of query embeddings keyed by sha256 of the query."""
+    @staticmethod
+    def make_key(query: str) -> str:
+        return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+    def put(self, key: Hashable, value: np.ndarray) -> None:
+        value.setflags(write=False)  # shared between requests
+        super().put(key, value)
+
+    def wrap(self, embed: Callable[[str], np.ndarray]) -> Callable[[str], np.ndarray]:
+        """Return embed with this cache in front of it."""
+        def cached_embed(query: str) -> np.ndarray:
+            key = self.make_key(query)
+            vector = self.get(key)
+            if vector is None:
+                vector = embed(query)
+                self.put(key, vector)
+            return vector
+        return cached_embed
+
+    def wrap_batch(self, embed_many: Callable[[list[str]], np.ndarray]) -> Callable[[list[str]], np.ndarray]:
+        """Return embed_many with this cache in front of it; the misses are encoded in one call."""
+        def cached_embed_many(queries: list[str]) -> np.ndarray:
+            vectors = [self.get(self.make_key(query)) for query in queries]
+            missing = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is None))
+            if missing:
+                encoded = dict(zip(missing, embed_many(missing)))
+                for query, vector in encoded.items():
+                    self.put(self.make_key(query), vector)
+                vectors = [encoded[q] if v is None else v for q, v in zip(queries, vectors)]
+            return np.stack(vectors)
+        return cached_embed_many
+
+class IndexVersion:
+    """Version of the index on disk: manifest["index_version"], re-read only when the manifest file changes.
+
+    Manifests written before index_version existed are versioned by their mtime and size.
+    """
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = manifest_path
+        self._signature: tuple[int, int] | None = None
+        self._version = "missing"
+        self._lock = threading.Lock()
+
+    def current(self) -> str:
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return "missing"
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if signature != self._signature:
+                try:
+                    manifest = json.loads(Path(self.manifest_path).read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    return f"{signature[0]}-{signature[1]}"  # mid-write; do not remember it
+                self._version = manifest.get("index_version") or f"{signature[0]}-{signature[1]}"
+                self._signature = signature
+            return self._version
+
 @dataclass
 class AppState:
     collection: Any
     doc_meta: dict[str, DocMeta]
-    embed_query: Callable[[str], list[float]]
+    embed_query: Callable[[str], np.ndarray]
+    embed_queries: Callable[[list[str]], np.ndarray]
+    load_timings: dict[str, float] = field(default_factory=dict)
+    query_cache: QueryEmbeddingCache | None = None
+    content_cache: LRUCache | None = None
+    index_version: IndexVersion | None = None
+    # Used to turn Chroma distances into similarities and chunk hits into document scores
+    distance_space: str = "l2"
+    normalized_embeddings: bool = True
+    aggregator: str = "max"
+    # doc ids of each area in doc_meta, to size filtered searches
+    docs_by_area: dict[str, frozenset[str]] = field(default_factory=dict)
+
+def index_docs_by_area(doc_meta: dict[str, DocMeta]) -> dict[str, frozenset[str]]:
+    by_area: dict[str, set[str]] = {}
+    for doc_id, meta in doc_meta.items():
+        by_area.setdefault(meta.area, set()).add(doc_id)
+    return {area: frozenset(ids) for area, ids in by_area.items()}
 
 def load_doc_meta(metadata_path: Path) -> dict[str, DocMeta]:
     if not metadata_path.exists():
@@ -32,20 +173,88 @@ def load_doc_meta(metadata_path: Path) -> dict[str, DocMeta]:
                 source_uri=info.get("source_uri")
             )
     elif isinstance(raw, list):
+        # metadata.json entries: {"id", "area", "title", "source": {"type", "path" | "url" | ...}}
         for entry in raw:
-            doc_id = entry.get("doc_id")
+            doc_id = entry.get("id") or entry.get("doc_id")
             if doc_id:
+                source = entry.get("source") or {}
                 meta[doc_id] = DocMeta(
                     title=entry.get("title", "Untitled"),
                     area=entry.get("area", "General"),
-                    source_uri=entry.get("source_uri")
+                    source_uri=entry.get("source_uri") or source.get("path") or source.get("url")
                 )
     return meta
 
-def init_state(chroma_dir: Path, collection_name: str, metadata_path: Path, manifest_path: Path) -> AppState:
+def _collection_distance_space(collection: Any) -> str:
+    """hnsw:space of the collection ("l2", "cosine" or "ip"); Chroma defaults to "l2"."""
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space is None:
+        configuration = getattr(collection, "configuration_json", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+    return space or "l2"
+
+def init_state(
+    chroma_dir: Path,
+    collection_name: str,
+    metadata_path: Path,
+    manifest_path: Path,
+    warm_up: bool = True,
+    query_cache_size: int = 1024,
+    query_cache_ttl_s: float | None = None,
+    content_cache_size: int = 256,
+    aggregator: str = "max",
+) -> AppState:
+    """Open the collection, load the doc metadata and the embedding model, timing each step.
+
+    With warm_up, the model also encodes a dummy query so the first search runs at steady-state speed.
+    Query embeddings go through a QueryEmbeddingCache of query_cache_size entries, and assembled
+    article contents through an LRUCache of content_cache_size entries (0 disables either).
+    aggregator is the default document scoring of searches, see mcp_server.tools.AGGREGATORS.
+    """
+    timings: dict[str, float] = {}
+
+    t0 = time.perf_counter()
     client = chromadb.PersistentClient(chroma_dir)
     collection = client.get_collection(collection_name, embedding_function=None)
+    timings["chroma_s"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
     doc_meta = load_doc_meta(metadata_path)
+    timings["doc_meta_s"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
     embedder = Embedder.from_manifest(manifest_path)
-    f_query = lambda text: embedder.embed_texts([text])[0]
-    return AppState(collection=collection, doc_meta=doc_meta, embed_query=f_query)
\ No newline at end of file
+    timings["model_load_s"] = time.perf_counter() - t0
+
+    if warm_up:
+        t0 = time.perf_counter()
+        embedder.warm_up()
+        timings["warm_up_s"] = time.perf_counter() - t0
+
+    logger.info(
+        "Loaded collection %r (%d chunks), %d docs metadata and model %r: %s",
+        collection_name, collection.count(), len(doc_meta), embedder.config.model_name,
+        ", ".join(f"{k}={v:.2f}" for k, v in timings.items()),
+    )
+
+    f_query = lambda text: embedder.embed_array([text])[0]
+    f_queries = lambda texts: embedder.embed_array(texts)
+    query_cache = None
+    if query_cache_size > 0:
+        query_cache = QueryEmbeddingCache(max_entries=query_cache_size, ttl_s=query_cache_ttl_s)
+        f_query = query_cache.wrap(f_query)
+        f_queries = query_cache.wrap_batch(f_queries)
+    return AppState(
+        collection=collection,
+        doc_meta=doc_meta,
+        embed_query=f_query,
+        embed_queries=f_queries,
+        load_timings=timings,
+        query_cache=query_cache,
+        content_cache=LRUCache(max_entries=content_cache_size) if content_cache_size > 0 else None,
+        index_version=IndexVersion(manifest_path),
+        distance_space=_collection_distance_space(collection),
+        normalized_embeddings=embedder.config.normalize_embeddings,
+        aggregator=aggregator,
+        docs_by_area=index_docs_by_area(doc_meta),
+    )
\ No newline at end of file
@@ -1,58 +1,129 @@
+from bisect import bisect_right
 from collections import defaultdict
-from typing import Literal, Any
+from dataclasses import dataclass
+from typing import Any, Callable, Literal
+import numpy as np
 from pydantic import BaseModel
 from mcp_server.storage import AppState
 
 Area = Literal["Mathematics", "Medicine", "Economics"]
 
+class ChunkSnippet(BaseModel):
+    text: str
+    score: float
+    page_start: int | None = None
+    page_end: int | None = None
+    char_start: int | None = None
+    char_end: int | None = None
+
 class SearchHit(BaseModel):
     id: str
     title: str
     area: Area
     score: float
+    snippets: list[ChunkSnippet] | None = None
 
 class ArticleContent(BaseModel):
     id: str
     title: str
     area: Area
     content: str
+    offset: int = 0
+    next_offset: int | None = None
 
-def _distance_to_score(distance: float) -> float:
-    # define score
-    s = distance
-    return s
+@dataclass(frozen=True)
+class _AssembledArticle:
+    """Formatted chunks of a document before the max_chars/offset window is applied."""
+    id: str
+    title: str
+    area: str
+    parts: tuple[str, ...]
+    starts: tuple[int, ...]  # offset of each part in the full content
 
-def search_articles_impl(state: AppState, query: str, *, k_chunks: int=60, k_docs: int=5) -> list[SearchHit]:
-    q = (query or "").strip()
-    if not q:
-        return []
-    
-    q_emb = state.embed_query(q)
-    res = state.collection.query(
-        query_embeddings=[q_emb],
-        n_results=k_chunks,
-        include=['distances', 'metadatas']
-    )
+def _distance_to_score(distance: float, space: str = "l2", normalized: bool = True) -> float:
+    """Similarity (higher is better) from a Chroma distance in the collection's distance space."""
+    if space in ("cosine", "ip"):
+        return 1.0 - distance
+    # Squared L2: for unit vectors it is 2 - 2 * cosine similarity
+    if normalized:
+        return 1.0 - distance / 2.0
+    return 1.0 / (1.0 + distance)
+
+# An aggregator scores a document from its chunk hits, [(rank in the query results, similarity)] best first, and top_n
+Aggregator = Callable[[list[tuple[int, float]], int], float]
+
+AGGREGATORS: dict[str, Aggregator] = {}
+
+def register_aggregator(name: str) -> Callable[[Aggregator], Aggregator]:
+    def decorator(fn: Aggregator) -> Aggregator:
+        AGGREGATORS[name] = fn
+        return fn
+    return decorator
+
+def get_aggregator(name: str) -> Aggregator:
+    try:
+        return AGGREGATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown aggregator {name!r}. Available: {sorted(AGGREGATORS)}")
+
+@register_aggregator("max")
+def _max_score(hits: list[tuple[int, float]], top_n: int) -> float:
+    """Similarity of the best-matching chunk."""
+    return hits[0][1]
 
-    metadatas: list[dict[str, Any]] = (res.get("metadatas") or [[]])[0]
-    distances: list[float] = (res.get("distances") or [[]])[0]
+@register_aggregator("mean_top_n")
+def _mean_top_n_score(hits: list[tuple[int, float]], top_n: int) -> float:
+    """Mean similarity of the top_n best-matching chunks (fewer if the document has fewer hits)."""
+    top = hits[:top_n]
+    return sum(score for _, score in top) / len(top)
 
-    per_doc_scores: dict[str, list[float]] = defaultdict(list)
+_RRF_K = 60
+
+@register_aggregator("rrf")
+def _rrf_score(hits: list[tuple[int, float]], top_n: int) -> float:
+    """Reciprocal-rank fusion over the document's chunks: sum of 1 / (60 + rank)."""
+    return sum(1.0 / (_RRF_K + rank + 1) for rank, _ in hits)
+
+def _aggregate_doc_hits(
+    state: AppState,
+    metadatas: list[dict[str, Any]],
+    distances: list[float],
+    k_docs: int,
+    aggregator: str,
+    top_n: int,
+    documents: list[str] | None = None,
+    max_snippets: int = 0,
+) -> list[SearchHit]:
+    """Turn the chunk hits of one query, best first, into its top k_docs document hits.
+
+    With documents (the chunk texts), each hit also carries its first max_snippets chunks in result order.
+    """
+    aggregate = get_aggregator(aggregator)
+    per_doc_hits: dict[str, list[tuple[int, float]]] = defaultdict(list)
     per_doc_area: dict[str, Area] = {}
+    per_doc_snippets: dict[str, list[ChunkSnippet]] = defaultdict(list)
 
-    for md, dist in zip(metadatas, distances):
+    for rank, (md, dist) in enumerate(zip(metadatas, distances)):
         doc_id = md.get("doc_id")
         if not doc_id:
             continue
-        per_doc_scores[doc_id].append(_distance_to_score(dist))
+        score = _distance_to_score(dist, state.distance_space, state.normalized_embeddings)
+        per_doc_hits[doc_id].append((rank, score))
         if doc_id not in per_doc_area:
             per_doc_area[doc_id] = md.get("area", "Unknown")
+        if documents is not None and len(per_doc_snippets[doc_id]) < max_snippets:
+            per_doc_snippets[doc_id].append(ChunkSnippet(
+                text=documents[rank],
+                score=score,
+                page_start=md.get("page_start"),
+                page_end=md.get("page_end"),
+                char_start=md.get("char_start"),
+                char_end=md.get("char_end"),
+            ))
 
-    doc_hits: list[tuple[str, float]] = []
-    for doc_id, scores in per_doc_scores.items():
-        top = sorted(scores, reverse=True)[:k_chunks]
-        score_doc = sum(top) / max(len(top), 1)
-        doc_hits.append((doc_id, score_doc))
+    doc_hits: list[tuple[str, float]] = [
+        (doc_id, aggregate(hits, top_n)) for doc_id, hits in per_doc_hits.items()
+    ]
 
     doc_hits.sort(key=lambda x: x[1], reverse=True)
     doc_hits = doc_hits[:k_docs]
@@ -62,34 +133,208 @@ def search_articles_impl(state: AppState, query: str, *, k_chunks: int=60, k_doc
         meta = state.doc_meta.get(doc_id)
         title = meta.title if meta else doc_id
         area = meta.area if meta else per_doc_area.get(doc_id, "Unknown")
-        out.append(SearchHit(id=doc_id, title=title, area=area, score=float(score)))
+        snippets = per_doc_snippets[doc_id] if documents is not None else None
+        out.append(SearchHit(id=doc_id, title=title, area=area, score=float(score), snippets=snippets))
 
     return out
 
-def get_article_content_impl(state: AppState, doc_id: str, *, max_chunks: int=100, max_chars: int=40000) -> ArticleContent:
-    did = (doc_id or "").strip()
-    if not did:
-        raise ValueError("Invalid doc_id")
+def _build_where(area: str | None, doc_ids: list[str] | None) -> dict[str, Any] | None:
+    """Chroma where clause restricting chunks to an area and/or a set of documents."""
+    clauses: list[dict[str, Any]] = []
+    if area:
+        clauses.append({"area": area})
+    if doc_ids:
+        clauses.append({"doc_id": doc_ids[0]} if len(doc_ids) == 1 else {"doc_id": {"$in": list(doc_ids)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def _n_candidate_docs(state: AppState, area: str | None, doc_ids: list[str] | None) -> int | None:
+    """Number of documents a filtered search can return according to doc_meta, None if unknown or unfiltered."""
+    candidates: set[str] | None = None
+    if area and state.docs_by_area:
+        candidates = set(state.docs_by_area.get(area, ()))
+    if doc_ids:
+        candidates = set(doc_ids) if candidates is None else candidates & set(doc_ids)
+    # doc_meta may lag behind the collection, so an empty set is not trusted
+    return len(candidates) if candidates else None
+
+def _query_chunks(
+    state: AppState,
+    q_embs: np.ndarray,
+    k_chunks: int,
+    k_docs: int,
+    max_k_chunks: int,
+    include: list[str],
+    where: dict[str, Any] | None = None,
+) -> list[dict[str, list]]:
+    """Chunk hits of each query embedding, as {"metadatas", "distances", "documents"} lists.
+
+    Queries whose k_chunks hits cover fewer than k_docs distinct documents are queried again with
+    twice as many chunks, until they do, the collection is exhausted or max_k_chunks is reached.
+    """
+    results: list[dict[str, list]] = [{} for _ in range(len(q_embs))]
+    pending = list(range(len(q_embs)))
+    k = min(k_chunks, max_k_chunks)
+    while pending:
+        res = state.collection.query(query_embeddings=q_embs[pending], n_results=k, include=include, where=where)
+        widen = []
+        for j, i in enumerate(pending):
+            results[i] = {key: (res.get(key) or [[] for _ in pending])[j] for key in ("metadatas", "distances", "documents")}
+            n_hits = len(results[i]["metadatas"])
+            n_docs = len({md.get("doc_id") for md in results[i]["metadatas"]})
+            if n_docs < k_docs and n_hits == k and k < max_k_chunks:
+                widen.append(i)
+        pending = widen
+        k = min(2 * k, max_k_chunks)
+    return results
+
+def _search_embedded(
+    state: AppState,
+    q_embs: np.ndarray,
+    k_chunks: int,
+    k_docs: int,
+    max_snippets: int,
+    aggregator: str | None,
+    top_n: int,
+    max_k_chunks: int,
+    area: str | None,
+    doc_ids: list[str] | None,
+) -> list[list[SearchHit]]:
+    aggregator = aggregator or state.aggregator
+    get_aggregator(aggregator)
+    include = ['distances', 'metadatas', 'documents'] if max_snippets > 0 else ['distances', 'metadatas']
+
+    # Do not widen the candidate pool looking for more documents than the filters allow
+    n_candidates = _n_candidate_docs(state, area, doc_ids)
+    k_docs_wanted = min(k_docs, n_candidates) if n_candidates is not None else k_docs
+    where = _build_where(area, doc_ids)
+    return [
+        _aggregate_doc_hits(
+            state, res["metadatas"], res["distances"], k_docs, aggregator, top_n,
+            res["documents"] if max_snippets > 0 else None, max_snippets,
+        )
+        for res in _query_chunks(state, q_embs, k_chunks, k_docs_wanted, max_k_chunks, include, where)
+    ]
+
+def search_articles_impl(
+    state: AppState,
+    query: str,
+    *,
+    k_chunks: int=20,
+    k_docs: int=5,
+    max_snippets: int=0,
+    aggregator: str | None=None,
+    top_n: int=3,
+    max_k_chunks: int=1000,
+    area: str | None=None,
+    doc_ids: list[str] | None=None,
+) -> list[SearchHit]:
+    """Doc-level hits for query; with max_snippets > 0 each hit carries its best-matching chunk texts.
+
+    k_chunks is the initial candidate pool, widened up to max_k_chunks until k_docs documents are found.
+    Documents are scored by aggregator (state.aggregator by default, see AGGREGATORS) over their chunks;
+    top_n is used by "mean_top_n". area and doc_ids restrict the search in Chroma with a where clause.
+    """
+    q = (query or "").strip()
+    if not q:
+        return []
     
-    res = state.collection.get(
-        where={"doc_id": did},
-        include=['documents', 'metadatas'],
+    q_emb = state.embed_query(q)
+    return _search_embedded(
+        state, q_emb.reshape(1, -1), k_chunks, k_docs, max_snippets, aggregator, top_n, max_k_chunks, area, doc_ids
+    )[0]
+
+def search_articles_batch_impl(
+    state: AppState,
+    queries: list[str],
+    *,
+    k_chunks: int=20,
+    k_docs: int=5,
+    max_snippets: int=0,
+    aggregator: str | None=None,
+    top_n: int=3,
+    max_k_chunks: int=1000,
+    area: str | None=None,
+    doc_ids: list[str] | None=None,
+) -> list[list[SearchHit]]:
+    """search_articles_impl for several queries: one encode call and one collection query for all of them.
+
+    Returns one list of hits per query, in order; empty queries get an empty list. The filters apply to every query.
+    """
+    qs = [(query or "").strip() for query in queries]
+    non_empty = [i for i, q in enumerate(qs) if q]
+    out: list[list[SearchHit]] = [[] for _ in qs]
+    if not non_empty:
+        return out
+
+    q_embs = state.embed_queries([qs[i] for i in non_empty])
+    hits = _search_embedded(
+        state, q_embs, k_chunks, k_docs, max_snippets, aggregator, top_n, max_k_chunks, area, doc_ids
     )
+    for i, query_hits in zip(non_empty, hits):
+        out[i] = query_hits
+    return out
+
+def _content_cache_key(state: AppState, did: str, max_chunks: int) -> tuple:
+    # Keyed by index version, so a re-index makes every cached content unreachable
+    version = state.index_version.current() if state.index_version is not None else ""
+    return (version, did, max_chunks)
+
+def get_article_content_impl(state: AppState, doc_id: str, *, max_chunks: int=100, max_chars: int=40000, offset: int=0) -> ArticleContent:
+    return get_articles_content_impl(state, [doc_id], max_chunks=max_chunks, max_chars=max_chars, offset=offset)[0]
+
+def get_articles_content_impl(state: AppState, doc_ids: list[str], *, max_chunks: int=100, max_chars: int=40000, offset: int=0) -> list[ArticleContent]:
+    """Contents of several documents, in order; ids missing from the cache are fetched with one collection.get.
+
+    Each content holds the whole chunks that start at or after offset (a position in the full content)
+    and fit in max_chars; next_offset is where the following call should start, or None at the end.
+    """
+    dids = [(doc_id or "").strip() for doc_id in doc_ids]
+    if not all(dids):
+        raise ValueError("Invalid doc_id")
+    if offset < 0 or max_chars < 0:
+        raise ValueError("offset and max_chars must be non-negative")
+
+    articles: dict[str, _AssembledArticle] = {}
+    if state.content_cache is not None:
+        for did in dids:
+            cached = state.content_cache.get(_content_cache_key(state, did, max_chunks))
+            if cached is not None:
+                articles[did] = cached
+
+    missing = list(dict.fromkeys(did for did in dids if did not in articles))
+    if missing:
+        res = state.collection.get(
+            where={"doc_id": missing[0]} if len(missing) == 1 else {"doc_id": {"$in": missing}},
+            include=['documents', 'metadatas'],
+        )
 
-    docs: list[str] = res.get("documents", [])
-    metadatas: list[dict[str, Any]] = res.get("metadatas", [])
+        rows_by_doc: dict[str, list[tuple[str, dict[str, Any]]]] = defaultdict(list)
+        for text, md in zip(res.get("documents", []), res.get("metadatas", [])):
+            rows_by_doc[md.get("doc_id")].append((text, md))
 
-    if not docs:
-        meta = state.doc_meta.get(did)
-        return ArticleContent(
+        for did in missing:
+            article = _assemble_article(state, did, rows_by_doc.get(did, []), max_chunks)
+            if state.content_cache is not None:
+                state.content_cache.put(_content_cache_key(state, did, max_chunks), article)
+            articles[did] = article
+
+    return [_article_window(articles[did], max_chars, offset) for did in dids]
+
+def _assemble_article(state: AppState, did: str, chunks: list[tuple[str, dict[str, Any]]], max_chunks: int) -> _AssembledArticle:
+    meta = state.doc_meta.get(did)
+    if not chunks:
+        return _AssembledArticle(
             id=did,
             title=meta.title if meta else did,
             area=meta.area if meta else "Unknown",
-            content=""
+            parts=(),
+            starts=()
         )
     
     rows = []
-    for text, md in zip(docs, metadatas):
+    for text, md in chunks:
         page = md.get("page_start", md.get("page"))
         cs = md.get("char_start", md.get("char"))
         ce = md.get("char_end")
@@ -98,22 +343,56 @@ def get_article_content_impl(state: AppState, doc_id: str, *, max_chunks: int=10
     rows.sort(key=lambda x: (x[0], x[1]))
 
     parts: list[str] = []
-    total = 0
+    starts: list[int] = []
+    position = 0
     for page, cs, ce, text, md in rows[:max_chunks]:
         header = f"[doc_id={did} page={page} chars={cs}-{ce}]\n"
         chunk = f"{header}{text}\n\n"
-        if total + len(chunk) > max_chars:
-            break
         parts.append(chunk)
-        total += len(chunk) + 2
+        starts.append(position)
+        position += len(chunk)
 
-    meta = state.doc_meta.get(did)
     area = meta.area if meta else (rows[0][4].get("area", "Unknown") if rows else "Unknown")
     title = meta.title if meta else 'unknown'
 
+    return _AssembledArticle(id=did, title=title, area=area, parts=tuple(parts), starts=tuple(starts))
+
+def _article_window(article: _AssembledArticle, max_chars: int, offset: int) -> ArticleContent:
+    """Content from offset, whole parts while they fit max_chars.
+
+    An offset inside a part starts from that position, and a part that alone exceeds max_chars is cut,
+    so every call not at the end returns some content and next_offset always moves forward.
+    """
+    length = article.starts[-1] + len(article.parts[-1]) if article.parts else 0
+    offset = max(offset, 0)
+    if offset >= length:
+        return ArticleContent(id=article.id, title=article.title, area=article.area, content="", offset=offset, next_offset=None)
+
+    first = bisect_right(article.starts, offset) - 1
+    head = article.parts[first][offset - article.starts[first]:]
+    end = first
+    total = 0
+    pieces = []
+    while end < len(article.parts):
+        piece = head if end == first else article.parts[end]
+        if total + len(piece) > max_chars:
+            break
+        pieces.append(piece)
+        total += len(piece) + 2
+        end += 1
+
+    if not pieces:
+        content = head[:max(max_chars, 1)]
+        next_offset = offset + len(content)
+    else:
+        content = "".join(pieces)
+        next_offset = article.starts[end] if end < len(article.parts) else length
+
     return ArticleContent(
-        id=did,
-        title=title,
-        area=area,
-        content="".join(parts)
-    )
\ No newline at end of file
+        id=article.id,
+        title=article.title,
+        area=article.area,
+        content=content,
+        offset=offset,
+        next_offset=next_offset if next_offset < length else None
+    )
@@ -0,0 +1,83 @@
+# Benchmark chunk_document against the previous per-chunk page_map scan on a synthetic many-page document
+
+import argparse
+import time
+from indexer.chunking import chunk_document
+from indexer.types import Chunk, Document
+
+def _chunk_document_page_scan(document: Document, chunk_size: int, chunk_overlap: int) -> list[Chunk]:
+    """Previous implementation: rescans the whole page_map for every chunk (O(chunks x pages))."""
+    chunks = []
+    content = document.content
+    char_start = 0
+    chunk_index = 0
+    while char_start < len(content):
+        char_end = min(char_start + chunk_size, len(content))
+        chunk_text = content[char_start:char_end]
+        page_start = None
+        page_end = None
+        accumulated_chars = 0
+        for page in document.page_map:
+            page_length = len(page["text"])
+            if accumulated_chars <= char_start < accumulated_chars + page_length:
+                page_start = page["page_idx"]
+            if accumulated_chars < char_end <= accumulated_chars + page_length:
+                page_end = page["page_idx"]
+            accumulated_chars += page_length + 2
+        chunks.append(Chunk(
+            chunk_id=f"{document.doc_id}::p{page_start}-{page_end}::c{chunk_index}",
+            doc_id=document.doc_id,
+            area=document.area,
+            text=chunk_text,
+            page_start=page_start,
+            page_end=page_end,
+            source_uri=document.source_uri,
+            char_start=char_start,
+            char_end=char_end,
+            token_count=len(chunk_text.split())
+        ))
+        chunk_index += 1
+        char_start += chunk_size - chunk_overlap
+    return chunks
+
+def _synthetic_document(n_pages: int, page_chars: int) -> Document:
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor ".split()
+    page_map = []
+    for i in range(n_pages):
+        text = " ".join(words[(i + j) % len(words)] for j in range(page_chars // 6))[:page_chars]
+        page_map.append({"page_idx": i + 1, "text": text, "char_count": len(text), "nonspace_char_count": len(text)})
+    return Document(
+        doc_id="synthetic",
+        title="Synthetic",
+        area="Mathematics",
+        source_type="pdf",
+        source_uri="synthetic.pdf",
+        content="\n\n".join(p["text"] for p in page_map),
+        page_map=page_map,
+    )
+
+def _time(fn, *args) -> tuple[float, list[Chunk]]:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunk-to-page mapping in chunk_document.")
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--page-chars', type=int, default=3000)
+    parser.add_argument('--chunk-size', type=int, default=40)
+    parser.add_argument('--chunk-overlap', type=int, default=10)
+    args = parser.parse_args()
+
+    document = _synthetic_document(args.pages, args.page_chars)
+    t_scan, scan_chunks = _time(_chunk_document_page_scan, document, args.chunk_size, args.chunk_overlap)
+    t_new, new_chunks = _time(chunk_document, document, args.chunk_size, args.chunk_overlap)
+
+    assert [c.model_dump() for c in scan_chunks] == [c.model_dump() for c in new_chunks], "chunk outputs differ"
+    print(f"pages={args.pages} chars={len(document.content)} chunks={len(new_chunks)}")
+    print(f"page scan : {t_scan:.3f}s")
+    print(f"bisect    : {t_new:.3f}s")
+    print(f"speedup   : {t_scan / max(t_new, 1e-9):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Benchmark PDF text extraction backends (pypdf vs PyMuPDF) on in-memory PDF bytes
+
+import argparse
+import time
+from io import BytesIO
+from pathlib import Path
+from pypdf import PdfReader
+from indexer.sources.pdf import pdf_bytes_ingestor
+
+def _extract_pypdf(data: bytes) -> int:
+    """Previous URL-PDF backend; returns the number of extracted characters."""
+    reader = PdfReader(BytesIO(data))
+    return len("\n".join(page.extract_text() or "" for page in reader.pages))
+
+def _extract_pymupdf(data: bytes) -> int:
+    """Current backend shared by local and URL PDFs; returns the number of extracted characters."""
+    document = pdf_bytes_ingestor(id="bench", title="bench", area="unknown", data=data, source_uri="bench.pdf")
+    return len(document.content)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pypdf and PyMuPDF extraction time on PDF bytes.")
+    parser.add_argument('--pdf-dir', type=str, default='data/articles/pdfs')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    totals = {"pypdf": 0.0, "pymupdf": 0.0}
+    for pdf_path in sorted(Path(args.pdf_dir).glob("*.pdf")):
+        data = pdf_path.read_bytes()
+        row = []
+        for name, fn in (("pypdf", _extract_pypdf), ("pymupdf", _extract_pymupdf)):
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                n_chars = fn(data)
+            elapsed = (time.perf_counter() - t0) / args.repeat
+            totals[name] += elapsed
+            row.append(f"{name}={elapsed:.3f}s ({n_chars} chars)")
+        print(f"{pdf_path.name}: " + "  ".join(row))
+
+    print(f"total: pypdf={totals['pypdf']:.3f}s  pymupdf={totals['pymupdf']:.3f}s  "
+          f"speedup={totals['pypdf'] / max(totals['pymupdf'], 1e-9):.1f}x")
+
+if __name__ == "__main__":
+    main()
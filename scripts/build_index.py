@@ -2,6 +2,7 @@
 
 import logging
 import argparse
+from indexer.chunking import CHUNKERS
 from indexer.pipeline import run_indexing_pipeline
 
 logger = logging.getLogger(__name__)
@@ -18,9 +19,24 @@ def main():
     parser.add_argument('--chroma-dir', type=str, default='data/chroma')
     parser.add_argument('--processed-dir', type=str, default='data/processed')
     parser.add_argument('--collection', type=str, required=True)
-    parser.add_argument('--chunk-size', type=int, required=True)
+    parser.add_argument('--chunk-size', type=int, required=True, help='Chunk size, in tokens for the tokenizer chunker and characters otherwise.')
     parser.add_argument('--chunk-overlap', type=int, required=True)
+    parser.add_argument('--chunker', type=str, default='char', choices=sorted(CHUNKERS), help='Chunking strategy.')
     parser.add_argument('--reset', action='store_true', help='Reset existing index data if set.')
+    parser.add_argument('--incremental', action='store_true', help='Only re-index documents whose source or indexing config changed since the last run.')
+    parser.add_argument('--stream-pdfs', action='store_true', help='Extract, clean and chunk PDFs page by page to bound memory on very large files. With --ingest-workers > 1, workers still return each document\'s chunks as one list.')
+    parser.add_argument('--ingest-workers', type=int, default=1, help='Number of processes used to ingest, clean and chunk documents.')
+    parser.add_argument('--embed-buffer-chunks', type=int, help='Chunks accumulated across documents before embedding (default: 16 * batch size).')
+    parser.add_argument('--embed-buffer-tokens', type=int, help='Optional token budget that also triggers embedding of the accumulated chunks.')
+    parser.add_argument('--embedding-cache', type=str, default='data/cache/embeddings.sqlite', help='SQLite file caching chunk embeddings across runs.')
+    parser.add_argument('--embedding-cache-max-mb', type=float, default=1024, help='Evict least recently used cached embeddings beyond this size.')
+    parser.add_argument('--no-embedding-cache', action='store_true', help='Disable the embedding cache.')
+    parser.add_argument('--html-extractor', type=str, default='default', choices=['default', 'fast'], help='HTML text extraction backend for URL sources (fast: lxml).')
+    parser.add_argument('--http-cache', type=str, default='data/cache/http', help='Directory caching fetched URLs; re-runs send conditional (ETag/Last-Modified) requests.')
+    parser.add_argument('--http-cache-max-mb', type=float, default=1024, help='Prune least recently used cached URLs beyond this size.')
+    parser.add_argument('--no-http-cache', action='store_true', help='Disable the HTTP cache (and URL prefetching).')
+    parser.add_argument('--url-workers', type=int, default=8, help='Threads used to prefetch URL sources.')
+    parser.add_argument('--max-requests-per-host', type=int, default=4, help='Maximum concurrent requests to the same host.')
     parser.add_argument('--embedding-model', type=str, required=True, help='Embedding model name or path.')
     parser.add_argument('--normalize-embeddings', action='store_false', help='Whether to normalize embeddings.')
     parser.add_argument('--batch-size', type=int, help='Batch size for embedding generation.')
@@ -31,7 +47,7 @@ def main():
 
     embedding_config = {
         "model_name": args.embedding_model,
-        "normalize": args.normalize_embeddings,
+        "normalize_embeddings": args.normalize_embeddings,
         "batch_size": args.batch_size,
         "max_length": args.max_length,
         "device": args.device,
@@ -48,6 +64,19 @@ def main():
         chunk_overlap=args.chunk_overlap,
         embedding_config=embedding_config,
         reset=args.reset,
+        incremental=args.incremental,
+        ingest_workers=args.ingest_workers,
+        embed_buffer_chunks=args.embed_buffer_chunks,
+        embed_buffer_tokens=args.embed_buffer_tokens,
+        embedding_cache_path=None if args.no_embedding_cache else args.embedding_cache,
+        embedding_cache_max_mb=args.embedding_cache_max_mb,
+        chunker=args.chunker,
+        stream_pdfs=args.stream_pdfs,
+        html_extractor=args.html_extractor,
+        http_cache_dir=None if args.no_http_cache else args.http_cache,
+        http_cache_max_mb=args.http_cache_max_mb,
+        url_workers=args.url_workers,
+        max_requests_per_host=args.max_requests_per_host,
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+# Check that clean_text matches the original multi-pass cleaning on the bundled PDFs (and time both)
+
+import argparse
+import re
+import time
+from pathlib import Path
+from indexer.cleaning import clean_text
+from indexer.sources.pdf import pdf_ingestor
+
+_WS_RE = re.compile(r"[ \t\f\v]+")
+_MANY_NEWLINES_RE = re.compile(r"\n{3,}")
+
+def _clean_text_reference(text: str) -> str:
+    """Original implementation of clean_document, kept as the equivalence oracle."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\x00", "")
+    text = "".join(ch for ch in text if ch == "\n" or ch == "\t" or ord(ch) >= 32)
+    text = _WS_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    text = _MANY_NEWLINES_RE.sub("\n\n", text)
+    return text.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare clean_text with the reference cleaning implementation.")
+    parser.add_argument('--pdf-dir', type=str, default='data/articles/pdfs')
+    parser.add_argument('--golden-dir', type=str, help='Compare against (or, with --write-golden, write) golden cleaned texts here.')
+    parser.add_argument('--write-golden', action='store_true')
+    args = parser.parse_args()
+
+    golden_dir = Path(args.golden_dir) if args.golden_dir else None
+    if golden_dir and args.write_golden:
+        golden_dir.mkdir(parents=True, exist_ok=True)
+
+    failures = 0
+    t_ref = t_new = 0.0
+    for pdf_path in sorted(Path(args.pdf_dir).glob("*.pdf")):
+        raw = pdf_ingestor(
+            id=pdf_path.stem, title=pdf_path.stem, area="unknown", source={"type": "pdf", "path": str(pdf_path)}
+        ).content
+
+        t0 = time.perf_counter()
+        expected = _clean_text_reference(raw)
+        t1 = time.perf_counter()
+        actual = clean_text(raw)
+        t2 = time.perf_counter()
+        t_ref += t1 - t0
+        t_new += t2 - t1
+
+        if golden_dir is not None:
+            golden_path = golden_dir / f"{pdf_path.stem}.txt"
+            if args.write_golden:
+                golden_path.write_text(expected, encoding="utf-8")
+            else:
+                expected = golden_path.read_text(encoding="utf-8")
+
+        status = "ok" if actual == expected else "MISMATCH"
+        failures += actual != expected
+        print(f"{pdf_path.name}: {status} ({len(raw)} chars)")
+
+    print(f"reference: {t_ref:.3f}s  clean_text: {t_new:.3f}s")
+    if failures:
+        raise SystemExit(f"{failures} document(s) differ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Check that the "fast" (lxml) HTML extractor matches the default (BeautifulSoup) one on saved pages (and time both)
+
+import argparse
+import difflib
+import time
+from pathlib import Path
+from indexer.sources.http import FetchResult
+from indexer.sources.url import _extract_text_from_html, _extract_text_from_html_fast, _text_from_html_response
+
+def _as_response(path: Path) -> FetchResult:
+    return FetchResult(
+        url=path.resolve().as_uri(),
+        status_code=200,
+        headers={"Content-Type": "text/html; charset=utf-8"},
+        content=path.read_bytes(),
+        fetched_at=0.0,
+    )
+
+def _first_difference(expected: str, actual: str) -> str:
+    diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(), "default", "fast", n=0, lineterm="")
+    return "\n".join(list(diff)[2:8])
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the fast and default HTML text extractors.")
+    parser.add_argument('--html-dir', type=str, default='data/fixtures/html')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    failures = 0
+    t_default = t_fast = 0.0
+    for html_path in sorted(Path(args.html_dir).glob("*.html")):
+        html = html_path.read_text(encoding="utf-8")
+        resp = _as_response(html_path)
+
+        # Extractor on the raw page, and end to end (readability summary + fallback) as url_ingestor runs it
+        checks = {
+            "raw": (_extract_text_from_html(html), _extract_text_from_html_fast(html)),
+            "response": (_text_from_html_response(resp, "default"), _text_from_html_response(resp, "fast")),
+        }
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            _text_from_html_response(resp, "default")
+        t1 = time.perf_counter()
+        for _ in range(args.repeat):
+            _text_from_html_response(resp, "fast")
+        t2 = time.perf_counter()
+        t_default += (t1 - t0) / args.repeat
+        t_fast += (t2 - t1) / args.repeat
+
+        for name, (expected, actual) in checks.items():
+            status = "ok" if actual == expected else "MISMATCH"
+            failures += actual != expected
+            print(f"{html_path.name} [{name}]: {status} ({len(expected)} chars)")
+            if actual != expected:
+                print(_first_difference(expected, actual))
+
+    print(f"default: {t_default:.4f}s  fast: {t_fast:.4f}s  speedup={t_default / max(t_fast, 1e-9):.1f}x")
+    if failures:
+        raise SystemExit(f"{failures} extraction(s) differ")
+
+if __name__ == "__main__":
+    main()
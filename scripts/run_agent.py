@@ -1,44 +1,35 @@
 import argparse
 import json
+import re
+import time
+from collections import Counter
 from pathlib import Path
+from typing import Any
 from agent.config import AgentConfig
 from agent.graph import build_graph
 from agent.state import AgentState
 
-def main() -> None:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--input-kind", choices=["text", "url", "pdf"], required=True)
-    ap.add_argument("--input", required=True, help="raw text, url, or path")
-    ap.add_argument("--out-dir", default="out")
-    ap.add_argument("--article-key-typo", choices=["artcle", "article"], default="artcle")
-    args = ap.parse_args()
-
-    cfg = AgentConfig()
-
-    graph = build_graph()
-
-    state = AgentState(input_kind=args.input_kind, input_value=args.input)
-    final_state = graph.invoke(state, config={"configurable": {"cfg": cfg}})  # langgraph compatible
-    
+def write_outputs(final_state: dict[str, Any], out_dir: Path, extraction_name: str, review_name: str) -> dict[str, Any]:
+    """Write the extraction, the review and agent_output.json of one run to out_dir; return the verbose result."""
     area = final_state.get("chosen_area", "") or final_state.get("area", "")
     extraction = final_state.get("extraction", {})
     review_md = final_state.get("review_markdown", "")
     warnings = final_state.get("warnings", [])
+    llm_debug = final_state.get("llm_debug", [])
 
-
-    out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    (out_dir / "extraction_1.json").write_text(
+    (out_dir / extraction_name).write_text(
         json.dumps(extraction, ensure_ascii=False, indent=2), encoding="utf-8"
     )
-    (out_dir / "review_1.md").write_text(review_md, encoding="utf-8")
+    (out_dir / review_name).write_text(review_md, encoding="utf-8")
 
     result_verbose = {
         "area": area,
         "extraction": extraction,
         "review_markdown": review_md,
         "warnings": warnings,
+        "llm_calls": llm_debug,
     }
     agent_output = {
         "area": area,
@@ -48,6 +39,120 @@ def main() -> None:
     (out_dir / "agent_output.json").write_text(
         json.dumps(agent_output, ensure_ascii=False, indent=2), encoding="utf-8"
     )
+    return result_verbose
+
+def read_batch(path: Path) -> list[dict[str, str]]:
+    """
+    Inputs of a batch run: a JSONL file (or a JSON list) of {"id"?, "input_kind", "input"} objects.
+    Missing ids are numbered by position; ids must be unique since they name the output directories
+    (characters other than letters, digits, "_", "-" and "." become "_", leading dots are dropped).
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    items: list[dict[str, str]] = []
+    for i, entry in enumerate(entries, start=1):
+        if entry.get("input_kind") not in ("text", "url", "pdf") or not isinstance(entry.get("input"), str):
+            raise ValueError(f"{path} entry {i}: expected input_kind in text/url/pdf and an input string, got {entry}")
+        # ids name output directories: keep them to one safe path component, never "." or ".."
+        item_id = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(entry.get("id") or f"input_{i}")).lstrip(".")
+        if not item_id:
+            raise ValueError(f"{path} entry {i}: id {entry.get('id')!r} is not usable as a directory name")
+        items.append({"id": item_id, "input_kind": entry["input_kind"], "input": entry["input"]})
+
+    duplicates = sorted(item_id for item_id, n in Counter(x["id"] for x in items).items() if n > 1)
+    if duplicates:
+        raise ValueError(f"{path}: duplicate ids {duplicates}")
+    return items
+
+def run_batch(graph: Any, cfg: AgentConfig, batch_path: Path, out_dir: Path, max_concurrency: int) -> None:
+    """
+    Run the graph on every input of batch_path in this process (one MCP session, model and LLM clients),
+    max_concurrency at a time. Outputs go to out_dir/<id>/, and out_dir/summary.json lists every input.
+    """
+    items = read_batch(batch_path)
+    states = [AgentState(input_kind=item["input_kind"], input_value=item["input"]) for item in items]
+
+    t0 = time.perf_counter()
+    results = graph.batch(
+        states,
+        config={"configurable": {"cfg": cfg}, "max_concurrency": max_concurrency},
+        return_exceptions=True,
+    )
+    elapsed_s = time.perf_counter() - t0
+
+    summary_items = []
+    for item, final_state in zip(items, results):
+        entry: dict[str, Any] = {"id": item["id"], "input_kind": item["input_kind"], "input": item["input"][:200]}
+        if isinstance(final_state, Exception):
+            entry.update(status="error", error=repr(final_state))
+        else:
+            result = write_outputs(final_state, out_dir / item["id"], "extraction.json", "review.md")
+            entry.update(
+                status="ok",
+                area=result["area"],
+                warnings=result["warnings"],
+                llm_cached_calls=sum(1 for call in result["llm_calls"] if call.get("cached")),
+                llm_calls=len(result["llm_calls"]),
+            )
+        summary_items.append(entry)
+
+    n_ok = sum(1 for entry in summary_items if entry["status"] == "ok")
+    summary = {
+        "n_inputs": len(items),
+        "n_ok": n_ok,
+        "n_errors": len(items) - n_ok,
+        "max_concurrency": max_concurrency,
+        "elapsed_s": round(elapsed_s, 3),
+        "items": summary_items,
+    }
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "summary.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps({k: v for k, v in summary.items() if k != "items"}, ensure_ascii=False, indent=2))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input-kind", choices=["text", "url", "pdf"])
+    ap.add_argument("--input", help="raw text, url, or path")
+    ap.add_argument("--batch", help="JSONL (or JSON list) of {id, input_kind, input} objects to process in one run, instead of --input")
+    ap.add_argument("--max-concurrency", type=int, default=4, help="inputs processed concurrently in --batch mode")
+    ap.add_argument("--out-dir", default="out")
+    ap.add_argument("--article-key-typo", choices=["artcle", "article"], default="artcle")
+    ap.add_argument("--html-extractor", choices=["default", "fast"], default="default", help="HTML text extraction for url inputs")
+    ap.add_argument("--llm-provider", choices=["openai", "huggingface", "stub"], default="openai", help="chat model provider (stub: offline, deterministic)")
+    ap.add_argument("--llm-cache", default=None, help="SQLite file caching validated LLM responses across runs, e.g. data/cache/llm.sqlite (only used with --temperature 0)")
+    ap.add_argument("--temperature", type=float, default=AgentConfig.temperature, help="LLM sampling temperature")
+    ap.add_argument("--llm-cache-ttl-s", type=float, default=None, help="expire cached LLM responses after this many seconds")
+    ap.add_argument("--llm-cache-max-mb", type=float, default=256, help="evict least recently used LLM responses beyond this size")
+    ap.add_argument("--mcp-transport", choices=["stdio", "inprocess"], default="stdio", help="run the MCP server as a subprocess or in this process")
+    args = ap.parse_args()
+
+    cfg = AgentConfig(
+        html_extractor=args.html_extractor,
+        mcp_transport=args.mcp_transport,
+        llm_provider=args.llm_provider,
+        temperature=args.temperature,
+        llm_cache_path=args.llm_cache,
+        llm_cache_ttl_s=args.llm_cache_ttl_s,
+        llm_cache_max_mb=args.llm_cache_max_mb,
+    )
+
+    graph = build_graph()
+
+    if args.batch:
+        run_batch(graph, cfg, Path(args.batch), Path(args.out_dir), args.max_concurrency)
+        return
+
+    if not args.input_kind or args.input is None:
+        ap.error("--input-kind and --input are required without --batch")
+
+    state = AgentState(input_kind=args.input_kind, input_value=args.input)
+    final_state = graph.invoke(state, config={"configurable": {"cfg": cfg}})  # langgraph compatible
+
+    result_verbose = write_outputs(final_state, Path(args.out_dir), "extraction_1.json", "review_1.md")
     print(json.dumps(result_verbose, ensure_ascii=False, indent=2))
 
 if __name__ == "__main__":
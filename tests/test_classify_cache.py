@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from agent import llm
+from agent.config import AgentConfig
+from agent.nodes.classify import node_classify
+from agent.state import AgentState
+
+RETRIEVED = [
+    {
+        "hit": {"score": 0.9},
+        "doc": {"area": "Mathematics", "title": "Primes", "content_snippet": "On prime numbers."},
+    }
+]
+
+@pytest.fixture
+def cfg(tmp_path):
+    llm.clear_llm_cache()
+    yield AgentConfig(llm_provider="stub", llm_cache_path=str(tmp_path / "llm_cache.sqlite"))
+    llm.clear_llm_cache()
+
+def _run(cfg: AgentConfig, answer: dict) -> dict:
+    llm._clients[("stub", None)] = FakeListChatModel(responses=[json.dumps(answer)])
+    state = AgentState(input_kind="text", input_value="-", normalized_text="A note on primes.", retrieved=RETRIEVED)
+    return node_classify(state, {"configurable": {"cfg": cfg}})
+
+def test_offered_label_is_cached(cfg):
+    first = _run(cfg, {"area": "Mathematics", "rationale": "primes"})
+    second = _run(cfg, {"area": "Mathematics", "rationale": "primes"})
+
+    assert first["chosen_area"] == second["chosen_area"] == "Mathematics"
+    assert first["llm_debug"] == [{"node": "classify", "cached": False}]
+    assert second["llm_debug"] == [{"node": "classify", "cached": True}]
+
+def test_label_not_offered_is_not_cached(cfg):
+    first = _run(cfg, {"area": "Medicine", "rationale": "wrong"})
+    second = _run(cfg, {"area": "Medicine", "rationale": "wrong"})
+
+    assert first["chosen_area"] == "Mathematics"
+    assert second["llm_debug"] == [{"node": "classify", "cached": False}]
+    assert llm.get_llm_response_cache(cfg).stats()["n_entries"] == 0